@@ -2,29 +2,102 @@
 Base Agent Class
 Foundation for all specialized agents
 """
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
-from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 
-from app.llm.llm_service import LLMService
-from app.services.state_manager import StateManager
-from app.tools.registry import ToolRegistry
+import orjson
+
+from app.core.config import settings
+from app.llm.llm_service import LLMTask, llm_service
+from app.llm.streaming import SentenceBuffer, split_sentences
+from app.services.state_manager import state_manager
+from app.tools.registry import tool_registry
 
 logger = logging.getLogger(__name__)
 
+# Stored message fields sent to the LLM
+LLM_MESSAGE_FIELDS = ("role", "content")
+
+_ERROR_MESSAGE = "I apologize, but I'm having trouble processing that. Could you please repeat?"
+
+# Bulkhead: caps in-flight LLM calls so a slow provider can't tie up every call
+_LLM_BULKHEAD = asyncio.Semaphore(settings.LLM_MAX_CONCURRENT_REQUESTS)
+_LLM_TIMEOUT_SECONDS = settings.LLM_TIMEOUT_SECONDS
+
+
+class FutureResultPlaceholder:
+    """
+    Stand-in for a tool result that is still being computed
+    Renders as "<pending:tool_id>" in the tool message sent to the LLM
+    """
+    
+    def __init__(self, tool_call_id: str, task: asyncio.Task):
+        self.tool_call_id = tool_call_id
+        self.task = task
+    
+    def __str__(self) -> str:
+        return f"<pending:{self.tool_call_id}>"
+    
+    @property
+    def content(self) -> str:
+        """Tool result content if resolved, placeholder text otherwise"""
+        if self.task.done():
+            return self.task.result()["content"]
+        return str(self)
+
 
-class BaseAgent(ABC):
+class BaseAgent:
     """
     Base class for all AI agents
     Provides common functionality for conversation management,
     tool execution, and state handling
+    
+    Subclasses must implement REQUIRED_METHODS; this is checked once when the
+    subclass is defined rather than by ABCMeta on every instantiation.
     """
     
+    # LLM tier hint for this agent's turns (see LLMService.generate_response)
+    llm_task: LLMTask = "complex"
+    
+    REQUIRED_METHODS = (
+        "get_agent_type",
+        "get_agent_name",
+        "_build_system_prompt",
+        "get_available_tools",
+    )
+    
+    __slots__ = (
+        "session_id",
+        "llm_service",
+        "state_manager",
+        "tool_registry",
+        "agent_type",
+        "agent_name",
+        "max_context_messages",
+        "_system_prompt",
+        "_tools",
+        "_greeting",
+        "_response_proto",
+    )
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        missing = [
+            name for name in BaseAgent.REQUIRED_METHODS
+            if getattr(cls, name) is getattr(BaseAgent, name)
+        ]
+        if missing:
+            raise TypeError(f"{cls.__name__} must implement {', '.join(missing)}")
+    
     def __init__(self, session_id: str):
         self.session_id = session_id
-        self.llm_service = LLMService()
-        self.state_manager = StateManager()
-        self.tool_registry = ToolRegistry()
+        
+        # Shared across agents so HTTP and Redis connections survive transfers
+        self.llm_service = llm_service
+        self.state_manager = state_manager
+        self.tool_registry = tool_registry
         
         # Agent metadata
         self.agent_type = self.get_agent_type()
@@ -32,26 +105,46 @@ class BaseAgent(ABC):
         
         # Conversation state
         self.max_context_messages = 20
+        
+        # Static prompt prefix, built once so it is byte-identical on every
+        # turn and providers can serve it from their prompt cache. Nothing
+        # per-turn (timestamps, session state) belongs here.
+        self._system_prompt = self._build_system_prompt()
+        self._tools = sorted(self.get_available_tools(), key=lambda tool: tool["name"])
+        self._greeting = self._build_greeting()
+        
+        # Per-turn responses are copies of this with only changed fields set;
+        # tuples keep the shared empty defaults immutable
+        self._response_proto = {
+            "message": "",
+            "agent": self.agent_type,
+            "tool_calls": (),
+            "tool_results": (),
+            "transfer_to": None,
+            "transfer_reason": None,
+            "cost": 0.0,
+            "latency": 0.0
+        }
     
-    @abstractmethod
     def get_agent_type(self) -> str:
         """Return agent type identifier"""
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def get_agent_name(self) -> str:
         """Return human-readable agent name"""
-        pass
+        raise NotImplementedError
+    
+    def _build_system_prompt(self) -> str:
+        """Build system prompt for this agent (called once per instance)"""
+        raise NotImplementedError
     
-    @abstractmethod
     def get_system_prompt(self) -> str:
         """Return system prompt for this agent"""
-        pass
+        return self._system_prompt
     
-    @abstractmethod
     def get_available_tools(self) -> List[Dict]:
         """Return list of available tools for this agent"""
-        pass
+        raise NotImplementedError
     
     def should_transfer(self, conversation_context: Dict) -> Optional[Dict]:
         """
@@ -73,112 +166,312 @@ class BaseAgent(ABC):
             Dict containing response message and any actions
         """
         try:
-            # Get conversation history
-            messages = await self._get_conversation_history()
-            
-            # Add user message
-            messages.append({"role": "user", "content": user_input})
-            
-            # Get system prompt and tools
-            system_prompt = self.get_system_prompt()
-            tools = self.get_available_tools()
+            messages, context = await self._prepare_turn(user_input)
             
             # Generate LLM response
-            llm_response = await self.llm_service.generate_response(
+            llm_response = await self._generate_response(
                 messages=messages,
-                system_prompt=system_prompt,
-                tools=tools,
-                temperature=0.7
+                system_prompt=self._system_prompt,
+                tools=self._tools,
+                temperature=0.7,
+                cache_scope=self._cache_scope(messages, context),
+                task=self.llm_task
             )
             
-            # Execute tool calls if any
-            tool_results = []
-            if llm_response.get("tool_calls"):
-                context = await self._get_session_context()
-                tool_results = await self.llm_service.execute_tool_calls(
-                    llm_response["tool_calls"],
-                    context
-                )
+            return await self._complete_turn(messages, context, llm_response)
+            
+        except Exception as e:
+            logger.error(f"Error processing input in {self.agent_type}: {e}", exc_info=True)
+            return self._error_response(e)
+    
+    async def stream_input(self, user_input: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process user input, yielding the reply sentence by sentence
+        
+        Text the LLM writes before any tool call is yielded as it streams in;
+        the follow-up written after tools run is yielded once it is ready.
+        
+        Args:
+            user_input: User's spoken input (from STT)
+        
+        Yields:
+            {"type": "sentence", "text": ...} events, then one
+            {"type": "response", "response": ...} with the process_input dict
+        """
+        sentences = SentenceBuffer()
+        spoke = False
+        
+        try:
+            messages, context = await self._prepare_turn(user_input)
+            
+            # The LLM stream is drained by its own task so the time the
+            # caller spends speaking each sentence doesn't count against
+            # the LLM timeout or hold a bulkhead slot
+            events: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+            producer = asyncio.create_task(self._stream_response(
+                events,
+                messages=messages,
+                system_prompt=self._system_prompt,
+                tools=self._tools,
+                temperature=0.7,
+                task=self.llm_task
+            ))
+            producer.add_done_callback(lambda _: events.put_nowait(None))
+            
+            llm_response = None
+            try:
+                while (event := await events.get()) is not None:
+                    if event["type"] == "text":
+                        for sentence in sentences.feed(event["text"]):
+                            spoke = True
+                            yield {"type": "sentence", "text": sentence}
+                    else:
+                        llm_response = event["response"]
                 
-                # If tools were called, get final response
-                if tool_results:
-                    messages.append({
-                        "role": "assistant",
-                        "content": llm_response["message"],
-                        "tool_calls": llm_response["tool_calls"]
-                    })
-                    
-                    # Add tool results
-                    for result in tool_results:
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": result["tool_call_id"],
-                            "name": result["name"],
-                            "content": result["content"]
-                        })
-                    
-                    # Get final response after tool execution
-                    llm_response = await self.llm_service.generate_response(
-                        messages=messages,
-                        system_prompt=system_prompt,
-                        tools=tools,
-                        temperature=0.7
-                    )
+                producer.result()
+            finally:
+                producer.cancel()
             
-            # Check for transfer
-            transfer_decision = self.should_transfer(
-                {"messages": messages, "last_response": llm_response}
-            )
+            rest = sentences.flush()
+            if rest:
+                spoke = True
+                yield {"type": "sentence", "text": rest}
             
-            # Build response
-            response = {
-                "message": llm_response["message"],
-                "agent": self.agent_type,
-                "tool_calls": llm_response.get("tool_calls", []),
-                "tool_results": tool_results,
-                "transfer_to": transfer_decision.get("transfer_to") if transfer_decision else None,
-                "transfer_reason": transfer_decision.get("reason") if transfer_decision else None,
-                "cost": llm_response.get("cost", 0.0),
-                "latency": llm_response.get("latency", 0.0)
-            }
+            response = await self._complete_turn(messages, context, llm_response)
             
-            return response
+            # Text after tool calls arrives in one piece
+            if llm_response.get("tool_calls"):
+                for sentence in split_sentences(response["message"]):
+                    yield {"type": "sentence", "text": sentence}
+            
+            yield {"type": "response", "response": response}
             
         except Exception as e:
             logger.error(f"Error processing input in {self.agent_type}: {e}", exc_info=True)
-            return {
-                "message": "I apologize, but I'm having trouble processing that. Could you please repeat?",
-                "agent": self.agent_type,
-                "error": str(e)
+            if not spoke:
+                yield {"type": "sentence", "text": _ERROR_MESSAGE}
+            yield {"type": "response", "response": self._error_response(e)}
+    
+    async def _prepare_turn(self, user_input: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Build the LLM messages for a new user turn"""
+        # Prompt layout, most stable first so the cached prefix survives:
+        # system prompt + tools -> committed history -> session context -> new turn
+        messages, context = await self._get_conversation_state()
+        
+        dynamic_block = self._build_dynamic_context(context)
+        if dynamic_block:
+            messages.append(dynamic_block)
+        
+        # Add user message
+        messages.append({"role": "user", "content": user_input})
+        
+        return messages, context
+    
+    async def _complete_turn(
+        self,
+        messages: List[Dict[str, Any]],
+        context: Dict[str, Any],
+        llm_response: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Run any requested tools, check for transfer and build the response"""
+        # Execute tool calls if any
+        tool_results = []
+        if llm_response.get("tool_calls"):
+            tool_results, llm_response = await self._run_tools_and_respond(
+                messages, llm_response, context, self._system_prompt, self._tools
+            )
+        
+        # Check for transfer
+        transfer_decision = self.should_transfer(
+            {"messages": messages, "last_response": llm_response}
+        )
+        
+        # Build response
+        response = self._response_proto.copy()
+        response["message"] = llm_response["message"]
+        if llm_response.get("tool_calls"):
+            response["tool_calls"] = llm_response["tool_calls"]
+        if tool_results:
+            response["tool_results"] = tool_results
+        if transfer_decision:
+            response["transfer_to"] = transfer_decision.get("transfer_to")
+            response["transfer_reason"] = transfer_decision.get("reason")
+        if "cost" in llm_response:
+            response["cost"] = llm_response["cost"]
+        if "latency" in llm_response:
+            response["latency"] = llm_response["latency"]
+        
+        return response
+    
+    def _error_response(self, error: Exception) -> Dict[str, Any]:
+        """Response returned when a turn fails"""
+        return {
+            "message": _ERROR_MESSAGE,
+            "agent": self.agent_type,
+            "error": str(error)
+        }
+    
+    async def _run_tools_and_respond(
+        self,
+        messages: List[Dict],
+        llm_response: Dict[str, Any],
+        context: Dict[str, Any],
+        system_prompt: str,
+        tools: List[Dict]
+    ) -> Tuple[List[Dict], Dict[str, Any]]:
+        """
+        Execute tool calls and generate the follow-up response
+        
+        If every requested tool allows speculation, the follow-up LLM call
+        starts as soon as the first tool finishes, with still-running tools
+        rendered as placeholders. That answer is kept only if it arrives
+        before the tools finish and neither references a placeholder nor
+        asks for more tools; otherwise it is cancelled and the call is
+        re-issued with the real results.
+        
+        Returns:
+            Tuple of (tool results, final LLM response)
+        """
+        tool_calls = llm_response["tool_calls"]
+        tasks = self.llm_service.schedule_tool_calls(tool_calls, context)
+        placeholders = [
+            FutureResultPlaceholder(tool_call["id"], task)
+            for tool_call, task in zip(tool_calls, tasks)
+        ]
+        
+        messages.append({
+            "role": "assistant",
+            "content": llm_response["message"],
+            "tool_calls": tool_calls
+        })
+        
+        speculative_response = None
+        if all(self.tool_registry.is_speculative(tc["name"]) for tc in tool_calls):
+            _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            
+            if pending:
+                pending_ids = [p.tool_call_id for p in placeholders if not p.task.done()]
+                speculation = asyncio.create_task(self._generate_response(
+                    messages=messages + self._tool_messages(tool_calls, placeholders),
+                    system_prompt=system_prompt,
+                    tools=tools,
+                    temperature=0.7,
+                    task=self.llm_task
+                ))
+                
+                while not speculation.done() and pending:
+                    _, pending = await asyncio.wait(
+                        {speculation, *pending}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    pending.discard(speculation)
+                
+                if (
+                    speculation.done()
+                    and not speculation.exception()
+                    and self._speculation_holds(speculation.result(), pending_ids)
+                ):
+                    speculative_response = speculation.result()
+                else:
+                    speculation.cancel()
+        
+        tool_results = list(await asyncio.gather(*tasks))
+        messages.extend(self._tool_messages(tool_calls, placeholders))
+        
+        if speculative_response is not None:
+            return tool_results, speculative_response
+        
+        # Get final response after tool execution
+        llm_response = await self._generate_response(
+            messages=messages,
+            system_prompt=system_prompt,
+            tools=tools,
+            temperature=0.7,
+            task=self.llm_task
+        )
+        return tool_results, llm_response
+    
+    async def _generate_response(self, **kwargs) -> Dict[str, Any]:
+        """
+        Call the LLM through the shared bulkhead with a per-call timeout
+        
+        Raises:
+            asyncio.TimeoutError: If the provider does not answer in time
+        """
+        async with _LLM_BULKHEAD:
+            return await asyncio.wait_for(
+                self.llm_service.generate_response(**kwargs),
+                timeout=_LLM_TIMEOUT_SECONDS
+            )
+    
+    async def _stream_response(self, events: asyncio.Queue, **kwargs):
+        """
+        Stream an LLM response into a queue through the shared bulkhead
+        with the same per-call timeout as _generate_response
+        """
+        async with _LLM_BULKHEAD:
+            async with asyncio.timeout(_LLM_TIMEOUT_SECONDS):
+                async for event in self.llm_service.stream_response(**kwargs):
+                    events.put_nowait(event)
+    
+    @staticmethod
+    def _tool_messages(
+        tool_calls: List[Dict],
+        placeholders: List[FutureResultPlaceholder]
+    ) -> List[Dict[str, str]]:
+        """Build tool result messages, with placeholders for pending tools"""
+        return [
+            {
+                "role": "tool",
+                "tool_call_id": tool_call["id"],
+                "name": tool_call["name"],
+                "content": placeholder.content
             }
+            for tool_call, placeholder in zip(tool_calls, placeholders)
+        ]
+    
+    @staticmethod
+    def _speculation_holds(response: Dict[str, Any], pending_ids: List[str]) -> bool:
+        """Check that a speculative response did not need unresolved results"""
+        if response.get("tool_calls"):
+            return False
+        message = response.get("message", "")
+        return not any(f"<pending:{tool_id}>" in message for tool_id in pending_ids)
     
     async def get_greeting(self) -> str:
+        """Get initial greeting message"""
+        return self._greeting
+    
+    def _build_greeting(self) -> str:
         """
-        Get initial greeting message
+        Build initial greeting message (called once per instance)
         Override in subclasses for custom greetings
         """
         return f"Hello! I'm your {self.agent_name}. How can I help you today?"
     
+    async def _get_conversation_state(self) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """Get formatted conversation history and session context in one fetch"""
+        session, messages = await self.state_manager.get_session_and_messages(
+            self.session_id,
+            limit=self.max_context_messages,
+            projection=LLM_MESSAGE_FIELDS
+        )
+        return messages, self._build_session_context(session)
+    
     async def _get_conversation_history(self) -> List[Dict[str, str]]:
         """Get formatted conversation history for LLM"""
-        messages = await self.state_manager.get_messages(
+        return await self.state_manager.get_messages(
             self.session_id,
-            limit=self.max_context_messages
+            limit=self.max_context_messages,
+            projection=LLM_MESSAGE_FIELDS
         )
-        
-        # Format for LLM
-        formatted = []
-        for msg in messages:
-            formatted.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-        
-        return formatted
     
     async def _get_session_context(self) -> Dict[str, Any]:
         """Get current session context"""
         session = await self.state_manager.get_session(self.session_id)
+        return self._build_session_context(session)
+    
+    def _build_session_context(self, session: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Extract the agent-facing context from session data"""
         if not session:
             return {}
         
@@ -190,6 +483,44 @@ class BaseAgent(ABC):
             "current_agent": session.get("current_agent")
         }
     
+    def _build_dynamic_context(self, context: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """
+        Build the per-turn session context message
+        
+        Sent as a user-role message after the committed history (never in the
+        system prompt) so it does not invalidate the cached prefix.
+        """
+        if not context.get("order_state") and not context.get("context"):
+            return None
+        
+        dynamic = {
+            "session_id": self.session_id,
+            "order_state": context.get("order_state", {}),
+            "context": context.get("context", {})
+        }
+        return {
+            "role": "user",
+            "content": f"[Session context] {orjson.dumps(dynamic, option=orjson.OPT_SORT_KEYS).decode()}"
+        }
+    
+    def _cache_scope(self, messages: List[Dict[str, Any]], context: Dict[str, Any]) -> str:
+        """
+        Build the semantic cache scope for this turn
+        
+        Keyed on agent type, session state and the last assistant reply so a
+        cached answer is only reused where the conversation is in the same place.
+        """
+        last_reply = next(
+            (m["content"] for m in reversed(messages) if m.get("role") == "assistant"),
+            ""
+        )
+        state = orjson.dumps(
+            [context.get("order_state", {}), context.get("context", {}), last_reply],
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            default=str
+        )
+        return f"{self.agent_type}:{hashlib.sha1(state).hexdigest()}"
+    
     def _format_tool_for_llm(self, tool_name: str, tool_func: callable) -> Dict:
         """
         Format tool definition for LLM function calling
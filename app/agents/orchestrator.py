@@ -2,11 +2,13 @@
 Agent Orchestrator
 Routes conversations to appropriate agents and manages handoffs
 """
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 
 from app.agents.base_agent import BaseAgent
-from app.services.state_manager import StateManager
+from app.llm.streaming import split_sentences
+from app.services.state_manager import state_manager
 
 # TODO: Import specialized agents when implemented
 # from app.agents.customer_order_agent import CustomerOrderAgent
@@ -18,6 +20,37 @@ from app.services.state_manager import StateManager
 
 logger = logging.getLogger(__name__)
 
+AGENT_TYPES = (
+    "customer_order",
+    "restaurant_coordination",
+    "driver_assignment",
+    "delivery_tracking",
+    "customer_support",
+    "post_delivery",
+)
+
+
+class PlaceholderAgent(BaseAgent):
+    """Generic agent used until the specialized agent classes are implemented"""
+    
+    __slots__ = ("_agent_type",)
+    
+    def __init__(self, session_id: str, agent_type: str):
+        self._agent_type = agent_type
+        super().__init__(session_id)
+    
+    def get_agent_type(self) -> str:
+        return self._agent_type
+    
+    def get_agent_name(self) -> str:
+        return self._agent_type.replace("_", " ").title()
+    
+    def _build_system_prompt(self) -> str:
+        return f"You are a {self.get_agent_name()} agent."
+    
+    def get_available_tools(self):
+        return []
+
 
 class AgentOrchestrator:
     """
@@ -27,22 +60,19 @@ class AgentOrchestrator:
     
     def __init__(self, session_id: str):
         self.session_id = session_id
-        self.state_manager = StateManager()
+        self.state_manager = state_manager
         self.current_agent: Optional[BaseAgent] = None
         
-        # Agent registry
-        self.agents = {
-            "customer_order": None,  # TODO: CustomerOrderAgent
-            "restaurant_coordination": None,  # TODO: RestaurantCoordinationAgent
-            "driver_assignment": None,  # TODO: DriverAssignmentAgent
-            "delivery_tracking": None,  # TODO: DeliveryTrackingAgent
-            "customer_support": None,  # TODO: CustomerSupportAgent
-            "post_delivery": None,  # TODO: PostDeliveryAgent
+        # Agent registry, built once per session and reused across transfers
+        # TODO: Swap in CustomerOrderAgent, RestaurantCoordinationAgent, etc.
+        self.agents: Dict[str, BaseAgent] = {
+            agent_type: PlaceholderAgent(session_id, agent_type)
+            for agent_type in AGENT_TYPES
         }
     
     async def initialize(self, initial_agent: str = "customer_order"):
         """Initialize orchestrator with starting agent"""
-        await self._load_agent(initial_agent)
+        self._load_agent(initial_agent)
     
     async def process_input(self, user_input: str) -> Dict[str, Any]:
         """
@@ -61,43 +91,79 @@ class AgentOrchestrator:
         response = await self.current_agent.process_input(user_input)
         
         # Handle agent transfer if requested
-        if response.get("transfer_to"):
-            await self.transfer_agent(
-                response["transfer_to"],
-                response.get("transfer_reason")
-            )
-            
-            # Get greeting from new agent
-            greeting = await self.current_agent.get_greeting()
-            response["message"] = (
-                f"{response['message']} "
-                f"Let me transfer you to {self.current_agent.get_agent_name()}. "
-                f"{greeting}"
-            )
+        handoff = await self._handle_transfer(response)
+        if handoff:
+            response["message"] = f"{response['message']} {handoff}"
         
         return response
     
-    async def transfer_agent(self, new_agent_type: str, reason: Optional[str] = None):
+    async def stream_input(self, user_input: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process user input with current agent, yielding the reply as it forms
+        
+        Args:
+            user_input: User's spoken input
+        
+        Yields:
+            {"type": "sentence", "text": ...} events, then one
+            {"type": "response", "response": ...} as from process_input
+        """
+        if not self.current_agent:
+            await self.initialize()
+        
+        async for event in self.current_agent.stream_input(user_input):
+            if event["type"] == "response":
+                response = event["response"]
+                
+                # Handle agent transfer if requested
+                handoff = await self._handle_transfer(response)
+                if handoff:
+                    for sentence in split_sentences(handoff):
+                        yield {"type": "sentence", "text": sentence}
+                    response["message"] = f"{response['message']} {handoff}"
+            
+            yield event
+    
+    async def _handle_transfer(self, response: Dict[str, Any]) -> Optional[str]:
+        """Transfer if the response asks for it; return the handoff line to speak"""
+        if not response.get("transfer_to"):
+            return None
+        
+        greeting = await self.transfer_agent(
+            response["transfer_to"],
+            response.get("transfer_reason")
+        )
+        return f"Let me transfer you to {self.current_agent.get_agent_name()}. {greeting}"
+    
+    async def transfer_agent(self, new_agent_type: str, reason: Optional[str] = None) -> str:
         """
         Transfer conversation to a new agent
         
         Args:
             new_agent_type: Type of agent to transfer to
             reason: Reason for transfer
+        
+        Returns:
+            Greeting from the new agent
         """
         old_agent_type = self.current_agent.get_agent_type() if self.current_agent else None
         
         logger.info(f"Transferring: {old_agent_type} -> {new_agent_type}")
         
-        # Save transfer in state
-        await self.state_manager.switch_agent(
-            self.session_id,
-            new_agent_type,
-            reason
+        # Load new agent (registry lookup, no I/O)
+        self._load_agent(new_agent_type)
+        
+        # Save transfer in state while the new agent prepares its greeting
+        _, greeting = await asyncio.gather(
+            self.state_manager.switch_agent(
+                self.session_id,
+                new_agent_type,
+                reason
+            ),
+            self.current_agent.get_greeting()
         )
         
-        # Load new agent
-        await self._load_agent(new_agent_type)
+        return greeting
     
     async def get_greeting(self) -> str:
         """Get greeting from current agent"""
@@ -106,35 +172,16 @@ class AgentOrchestrator:
         
         return await self.current_agent.get_greeting()
     
-    async def _load_agent(self, agent_type: str):
+    def _load_agent(self, agent_type: str):
         """Load agent by type"""
-        # TODO: Instantiate actual agent classes when implemented
-        # For now, this is a placeholder
         logger.info(f"Loading agent: {agent_type}")
         
-        # if agent_type == "customer_order":
-        #     self.current_agent = CustomerOrderAgent(self.session_id)
-        # elif agent_type == "restaurant_coordination":
-        #     self.current_agent = RestaurantCoordinationAgent(self.session_id)
-        # ... etc
+        agent = self.agents.get(agent_type)
+        if agent is None:
+            logger.warning(f"Unknown agent type: {agent_type}, keeping current agent")
+            agent = self.current_agent or self.agents["customer_order"]
         
-        # Placeholder: Keep current agent
-        if not self.current_agent:
-            # Create a simple placeholder
-            class PlaceholderAgent(BaseAgent):
-                def get_agent_type(self) -> str:
-                    return agent_type
-                
-                def get_agent_name(self) -> str:
-                    return agent_type.replace("_", " ").title()
-                
-                def get_system_prompt(self) -> str:
-                    return f"You are a {self.get_agent_name()} agent."
-                
-                def get_available_tools(self):
-                    return []
-            
-            self.current_agent = PlaceholderAgent(self.session_id)
+        self.current_agent = agent
 
 
 # TODO: Implement intent classification for automatic agent routing
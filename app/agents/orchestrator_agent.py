@@ -4,10 +4,124 @@ Analyzes user intent and routes to appropriate specialized agent
 Single entry point for all voice interactions
 """
 import logging
-from typing import Dict, Any
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Sequence, Set
+
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:  # Fall back to per-agent regexes
+    ahocorasick = None
+
+try:
+    import re2 as keyword_re  # DFA-based, linear time, no backtracking
+except ImportError:
+    keyword_re = re
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the kernel then runs as plain Python
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
 
 logger = logging.getLogger(__name__)
 
+# Utterances that decline further help
+_DECLINE_PHRASES = frozenset({"no", "nope", "no thanks", "nah", "no."})
+
+
+def _route(agent: str, intent: str, confidence: str, reason: str) -> Mapping[str, str]:
+    """Build a read-only routing decision, shared by every call that reaches it"""
+    return MappingProxyType({
+        "agent": agent,
+        "intent": intent,
+        "confidence": confidence,
+        "reason": reason
+    })
+
+
+# Routing decisions are fixed per branch, so they are built once at import
+_ROUTE_END_CONVERSATION = _route(
+    "order", "end_conversation", "high",
+    "Customer declined further assistance - ending call"
+)
+_ROUTE_DECLINED_ORDERING = _route(
+    "order", "continue_ordering", "high",
+    "Customer said no during ordering - offering menu"
+)
+_ROUTE_CONTINUE_ORDERING = {
+    state: _route(
+        "order", "continue_ordering", "high",
+        f"Currently in {state} state - continuing order flow"
+    )
+    for state in ("menu", "ordering", "address", "payment")
+}
+_ROUTE_SUPPORT = _route(
+    "support", "handle_complaint", "high",
+    "Support/complaint keywords detected"
+)
+_ROUTE_TRACKING = _route(
+    "tracking", "check_order_status", "high",
+    "Order exists + tracking keywords detected"
+)
+_ROUTE_FEEDBACK = _route(
+    "feedback", "collect_rating", "high",
+    "Feedback/rating keywords detected"
+)
+_ROUTE_RATING = _route(
+    "feedback", "process_rating", "high",
+    "Rating number detected in feedback/support context"
+)
+_ROUTE_TRACKING_DEFAULT = _route(
+    "tracking", "provide_update", "medium",
+    "Post-order state - defaulting to tracking"
+)
+_ROUTE_FALLBACK = _route(
+    "order", "start_new_order", "low",
+    "No clear routing - defaulting to Order Agent"
+)
+
+
+_FNV64_OFFSET = 0xCBF29CE484222325
+_FNV64_PRIME = 0x100000001B3
+
+
+@lru_cache(maxsize=65536)
+def _fnv1a64(word: str) -> int:
+    """Stable 64-bit FNV-1a word hash (Python's str hash is salted per process)"""
+    h = _FNV64_OFFSET
+    for byte in word.encode():
+        h = ((h ^ byte) * _FNV64_PRIME) & 0xFFFFFFFFFFFFFFFF
+    return h
+
+
+@njit(cache=True)
+def _match_masks(word_hashes, offsets, kw_hashes, kw_masks):
+    """
+    Agent bitmask per utterance
+    
+    Args:
+        word_hashes: Hashes of every word, utterances concatenated
+        offsets: Start of each utterance in word_hashes, plus a final end offset
+        kw_hashes: Sorted keyword hashes
+        kw_masks: Agent bitmask for each keyword hash
+    """
+    n_keywords = len(kw_hashes)
+    masks = np.zeros(len(offsets) - 1, dtype=np.uint32)
+    for i in range(len(offsets) - 1):
+        mask = np.uint32(0)
+        for j in range(offsets[i], offsets[i + 1]):
+            k = np.searchsorted(kw_hashes, word_hashes[j])
+            if k < n_keywords and kw_hashes[k] == word_hashes[j]:
+                mask |= kw_masks[k]
+        masks[i] = mask
+    return masks
+
 
 class OrchestratorAgent:
     """
@@ -26,10 +140,39 @@ class OrchestratorAgent:
             "feedback": ["rate", "rating", "review", "feedback", "star", "stars", "experience",
                         "satisfied", "happy", "unhappy"],
             "restaurant": ["restaurant", "kitchen", "preparing", "ready", "cook", "chef"],
-            "driver": ["driver", "deliver", "pickup", "vehicle", "bike", "car"]
+            "driver": ["driver", "deliver", "pickup", "vehicle", "bike", "car"],
+            # Pseudo-agent: rating numbers, only acted on in feedback/support states
+            "rating": ["1", "2", "3", "4", "5", "one", "two", "three", "four", "five", "star"]
         }
+        
+        # Keyword groups as frozensets for whole-word lookups
+        self.agent_routing_sets = {
+            agent_type: frozenset(keywords)
+            for agent_type, keywords in self.agent_routing.items()
+        }
+        
+        # Substring matching: one Aho-Corasick automaton when pyahocorasick
+        # is installed, otherwise one alternation regex per agent type
+        self._ac = self._build_automaton() if ahocorasick is not None else None
+        self._agent_regex = {
+            agent_type: keyword_re.compile("|".join(re.escape(k) for k in keywords))
+            for agent_type, keywords in self.agent_routing.items()
+        }
+        
+        # Keyword hash table for batch classification: sorted hashes plus the
+        # bitmask of agent types (bit i = self._batch_agents[i]) for each one
+        self._batch_agents = list(self.agent_routing)
+        keyword_masks: Dict[int, int] = {}
+        for bit, agent_type in enumerate(self._batch_agents):
+            for keyword in self.agent_routing[agent_type]:
+                keyword_hash = _fnv1a64(keyword)
+                keyword_masks[keyword_hash] = keyword_masks.get(keyword_hash, 0) | (1 << bit)
+        
+        hashes = sorted(keyword_masks)
+        self._kw_hashes = np.array(hashes, dtype=np.uint64)
+        self._kw_masks = np.array([keyword_masks[h] for h in hashes], dtype=np.uint32)
     
-    def route_to_agent(self, user_speech: str, conversation_state: Dict[str, Any]) -> Dict[str, str]:
+    def route_to_agent(self, user_speech: str, conversation_state: Dict[str, Any]) -> Mapping[str, str]:
         """
         Analyze user intent and route to appropriate agent
         
@@ -38,110 +181,139 @@ class OrchestratorAgent:
             conversation_state: Current conversation context
             
         Returns:
+            Read-only mapping, shared between calls:
             {
                 "agent": "order|tracking|support|feedback|restaurant|driver",
                 "intent": "specific_intent",
-                "confidence": "high|medium|low"
+                "confidence": "high|medium|low",
+                "reason": "why this agent was chosen"
             }
         """
         user_lower = user_speech.lower().strip()
         current_state = conversation_state.get("state", "menu")
         order_exists = bool(conversation_state.get("order_id"))
         
-        logger.info(f"🎯 Orchestrator analyzing: '{user_speech}'")
-        logger.info(f"   Current state: {current_state}, Order exists: {order_exists}")
+        # Lazy %-style args: nothing is formatted unless INFO is enabled
+        logger.info("🎯 Orchestrator analyzing: '%s'", user_speech)
+        logger.info("   Current state: %s, Order exists: %s", current_state, order_exists)
         
         # ========== PRIORITY 0: Handle "No" responses (highest priority) ==========
         
         # If customer says "no" after order confirmation → End conversation
-        if user_lower in ["no", "nope", "no thanks", "nah", "no."]:
+        if user_lower in _DECLINE_PHRASES:
             if current_state in ["confirmed", "tracking"] and order_exists:
-                return {
-                    "agent": "order",  # Let order agent handle goodbye
-                    "intent": "end_conversation",
-                    "confidence": "high",
-                    "reason": "Customer declined further assistance - ending call"
-                }
+                return _ROUTE_END_CONVERSATION  # Let order agent handle goodbye
             elif current_state in ["menu", "ordering"]:
-                return {
-                    "agent": "order",
-                    "intent": "continue_ordering",
-                    "confidence": "high",
-                    "reason": "Customer said no during ordering - offering menu"
-                }
+                return _ROUTE_DECLINED_ORDERING
         
         # ========== PRIORITY 1: Current state-based routing ==========
         
         # If actively ordering, address, or payment → Order Agent
-        if current_state in ["menu", "ordering", "address", "payment"]:
-            return {
-                "agent": "order",
-                "intent": "continue_ordering",
-                "confidence": "high",
-                "reason": f"Currently in {current_state} state - continuing order flow"
-            }
+        continue_ordering = _ROUTE_CONTINUE_ORDERING.get(current_state)
+        if continue_ordering is not None:
+            return continue_ordering
         
         # ========== PRIORITY 2: Explicit keyword-based routing ==========
         
+        # Whole-word hits are a hashed set lookup; the automaton only runs when
+        # a keyword has to be found inside a longer token ("stars", "driverless").
+        # A word hit is always a substring hit, so routing is unchanged.
+        user_words = frozenset(user_lower.split())
+        substring_matches = None
+        
+        def matches(agent_type: str) -> bool:
+            nonlocal substring_matches
+            if not self.agent_routing_sets[agent_type].isdisjoint(user_words):
+                return True
+            if substring_matches is None:
+                substring_matches = self._scan(user_lower)
+            return agent_type in substring_matches
+        
         # Support keywords (high priority) → Support Agent
-        if self._matches_keywords(user_lower, "support"):
-            return {
-                "agent": "support",
-                "intent": "handle_complaint",
-                "confidence": "high",
-                "reason": "Support/complaint keywords detected"
-            }
+        if matches("support"):
+            return _ROUTE_SUPPORT
         
         # Tracking keywords + order exists → Tracking Agent
-        if order_exists and self._matches_keywords(user_lower, "tracking"):
-            return {
-                "agent": "tracking",
-                "intent": "check_order_status",
-                "confidence": "high",
-                "reason": "Order exists + tracking keywords detected"
-            }
+        if order_exists and matches("tracking"):
+            return _ROUTE_TRACKING
         
         # Feedback keywords → Feedback Agent
-        if self._matches_keywords(user_lower, "feedback"):
-            return {
-                "agent": "feedback",
-                "intent": "collect_rating",
-                "confidence": "high",
-                "reason": "Feedback/rating keywords detected"
-            }
+        if matches("feedback"):
+            return _ROUTE_FEEDBACK
         
         # Rating numbers detected (only if in feedback or support state) → Feedback Agent
-        if current_state in ["feedback", "support"] and any(word in user_lower for word in ["1", "2", "3", "4", "5", "one", "two", "three", "four", "five", "star"]):
-            return {
-                "agent": "feedback",
-                "intent": "process_rating",
-                "confidence": "high",
-                "reason": "Rating number detected in feedback/support context"
-            }
+        if current_state in ["feedback", "support"] and matches("rating"):
+            return _ROUTE_RATING
         
         # ========== PRIORITY 3: Context-based defaults ==========
         
         # Order confirmed/tracking state but no specific keywords → Tracking Agent
         if current_state in ["confirmed", "tracking"] and order_exists:
+            return _ROUTE_TRACKING_DEFAULT
+        
+        # Fallback: Order Agent (start new order or handle food requests)
+        return _ROUTE_FALLBACK
+    
+    def _build_automaton(self) -> "ahocorasick.Automaton":
+        """
+        Compile every keyword into one Aho-Corasick automaton so a single
+        linear pass over the utterance yields all matching agent types
+        """
+        # A keyword can belong to several agents (e.g. "driver", "star")
+        keyword_agents: Dict[str, Set[str]] = {}
+        for agent_type, keywords in self.agent_routing.items():
+            for keyword in keywords:
+                keyword_agents.setdefault(keyword, set()).add(agent_type)
+        
+        automaton = ahocorasick.Automaton()
+        for keyword, agent_types in keyword_agents.items():
+            automaton.add_word(keyword, frozenset(agent_types))
+        automaton.make_automaton()
+        return automaton
+    
+    def _scan(self, user_speech: str) -> Set[str]:
+        """Return every agent type whose keywords occur in user speech"""
+        if self._ac is None:
             return {
-                "agent": "tracking",
-                "intent": "provide_update",
-                "confidence": "medium",
-                "reason": "Post-order state - defaulting to tracking"
+                agent_type for agent_type, pattern in self._agent_regex.items()
+                if pattern.search(user_speech)
             }
         
-        # Fallback: Order Agent (start new order or handle food requests)
-        return {
-            "agent": "order",
-            "intent": "start_new_order",
-            "confidence": "low",
-            "reason": "No clear routing - defaulting to Order Agent"
-        }
+        matches: Set[str] = set()
+        for _, agent_types in self._ac.iter(user_speech):
+            matches.update(agent_types)
+        return matches
     
-    def _matches_keywords(self, user_speech: str, agent_type: str) -> bool:
-        """Check if user speech matches keywords for an agent type"""
-        keywords = self.agent_routing.get(agent_type, [])
-        return any(keyword in user_speech for keyword in keywords)
+    def match_batch(self, utterances: Sequence[str]) -> List[Set[str]]:
+        """
+        Keyword-match many utterances at once (analytics, offline intent retraining)
+        
+        Unlike route_to_agent this matches whole words only, so "stars" does
+        not count as "star".
+        
+        Args:
+            utterances: User utterances to classify
+        
+        Returns:
+            Matching agent types for each utterance
+        """
+        offsets = np.zeros(len(utterances) + 1, dtype=np.int64)
+        word_hashes: List[int] = []
+        for i, utterance in enumerate(utterances):
+            word_hashes.extend(_fnv1a64(word) for word in utterance.lower().split())
+            offsets[i + 1] = len(word_hashes)
+        
+        masks = _match_masks(
+            np.array(word_hashes, dtype=np.uint64),
+            offsets,
+            self._kw_hashes,
+            self._kw_masks
+        )
+        
+        return [
+            {agent_type for bit, agent_type in enumerate(self._batch_agents) if mask >> bit & 1}
+            for mask in masks.tolist()
+        ]
     
     def get_routing_explanation(self, user_speech: str, conversation_state: Dict[str, Any]) -> str:
         """
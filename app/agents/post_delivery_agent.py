@@ -3,17 +3,64 @@ Post-Delivery Agent
 Handles feedback collection and post-delivery follow-up
 """
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from datetime import datetime
 
+import ahocorasick
+from cachetools import LRUCache
+
 logger = logging.getLogger(__name__)
 
+# Issue keywords -> category
+_ISSUE_KEYWORDS = {
+    "missing": "missing",
+    "forgot": "missing",
+    "cold": "quality",
+    "quality": "quality",
+    "wrong": "wrong",
+    "incorrect": "wrong",
+}
+
+# Category -> (resolution, compensation), checked in priority order
+_ISSUE_RESOLUTIONS: Dict[str, Tuple[str, str]] = {
+    "missing": (
+        "We'll immediately send the missing items at no extra cost.",
+        "Free delivery on missing items"
+    ),
+    "quality": (
+        "We apologize for the quality issue. We'll issue a 50% refund.",
+        "50% refund"
+    ),
+    "wrong": (
+        "We'll send the correct order immediately and you can keep the incorrect one.",
+        "Free correct order"
+    ),
+}
+
+_DEFAULT_RESOLUTION = (
+    "Our support team will contact you within 15 minutes to resolve this.",
+    "Priority support callback"
+)
+
+
+def _build_issue_automaton() -> ahocorasick.Automaton:
+    """Compile issue keywords into a single-pass matcher"""
+    automaton = ahocorasick.Automaton()
+    for keyword, category in _ISSUE_KEYWORDS.items():
+        automaton.add_word(keyword, category)
+    automaton.make_automaton()
+    return automaton
+
+
+_ISSUE_AUTOMATON = _build_issue_automaton()
+
 
 class PostDeliveryAgent:
     """Handles post-delivery interactions"""
     
-    def __init__(self):
-        self.feedback_db = {}
+    def __init__(self, max_feedback_entries: int = 10_000):
+        # Bounded so a long-running process doesn't keep every order's feedback
+        self.feedback_db = LRUCache(maxsize=max_feedback_entries)
     
     def collect_feedback(self, order_id: str, rating: int, comments: str = "") -> Dict[str, Any]:
         """
@@ -30,19 +77,20 @@ class PostDeliveryAgent:
         if not 1 <= rating <= 5:
             return {"success": False, "error": "Rating must be between 1 and 5"}
         
+        now = datetime.now()
         feedback = {
-            "feedback_id": f"FB{datetime.now().strftime('%Y%m%d%H%M%S')}",
+            "feedback_id": f"FB{now:%Y%m%d%H%M%S}",
             "order_id": order_id,
             "rating": rating,
             "comments": comments,
-            "collected_at": datetime.now().isoformat()
+            "collected_at": now
         }
         
         self.feedback_db[order_id] = feedback
         
-        logger.info(f"⭐ Feedback collected for order {order_id}: {rating}/5")
+        logger.info("⭐ Feedback collected for order %s: %s/5", order_id, rating)
         if comments:
-            logger.info(f"   Comments: {comments}")
+            logger.info("   Comments: %s", comments)
         
         # Determine response based on rating
         if rating >= 4:
@@ -82,10 +130,10 @@ class PostDeliveryAgent:
             discount = 10
             message = "Thank you for ordering! Here's 10% off on your next order!"
         
-        promo_code = f"SAVE{discount}{datetime.now().strftime('%m%d')}"
+        promo_code = f"SAVE{discount}{datetime.now():%m%d}"
         
-        logger.info(f"🎁 Promotion offered to {customer_phone}: {discount}% off")
-        logger.info(f"   Promo code: {promo_code}")
+        logger.info("🎁 Promotion offered to %s: %s%% off", customer_phone, discount)
+        logger.info("   Promo code: %s", promo_code)
         
         return {
             "success": True,
@@ -106,24 +154,16 @@ class PostDeliveryAgent:
         Returns:
             Resolution details
         """
-        logger.info(f"🔧 Post-delivery issue reported for order {order_id}")
-        logger.info(f"   Issue: {issue}")
+        logger.info("🔧 Post-delivery issue reported for order %s", order_id)
+        logger.info("   Issue: %s", issue)
         
         # Classify issue and provide resolution
-        issue_lower = issue.lower()
-        
-        if "missing" in issue_lower or "forgot" in issue_lower:
-            resolution = "We'll immediately send the missing items at no extra cost."
-            compensation = "Free delivery on missing items"
-        elif "cold" in issue_lower or "quality" in issue_lower:
-            resolution = "We apologize for the quality issue. We'll issue a 50% refund."
-            compensation = "50% refund"
-        elif "wrong" in issue_lower or "incorrect" in issue_lower:
-            resolution = "We'll send the correct order immediately and you can keep the incorrect one."
-            compensation = "Free correct order"
-        else:
-            resolution = "Our support team will contact you within 15 minutes to resolve this."
-            compensation = "Priority support callback"
+        categories = {category for _, category in _ISSUE_AUTOMATON.iter(issue.lower())}
+        
+        resolution, compensation = next(
+            (_ISSUE_RESOLUTIONS[category] for category in _ISSUE_RESOLUTIONS if category in categories),
+            _DEFAULT_RESOLUTION
+        )
         
         return {
             "success": True,
@@ -2,21 +2,46 @@
 Customer Support Agent
 Handles customer inquiries, complaints, and refunds
 """
+import itertools
 import logging
+import os
+import time
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from cachetools import LRUCache
+
 from app.services.order_service import OrderService
 
 logger = logging.getLogger(__name__)
 
+# Unique IDs without per-call strftime: a per-process prefix (so workers don't
+# collide) plus a counter seeded from the start time (so restarts don't either)
+_ID_SHARD = f"{os.getpid() & 0xFF:02X}"
+_refund_counter = itertools.count(int(time.time()))
+_ticket_counter = itertools.count(int(time.time()))
+
+# Statuses after which an order no longer needs tracking
+_TERMINAL_STATUSES = frozenset(("delivered", "completed", "cancelled"))
+
+# Customer-facing text for each order status
+_STATUS_MESSAGES = {
+    "placed": "Your order has been placed and is being confirmed.",
+    "confirmed": "Your order is confirmed and will be prepared shortly.",
+    "preparing": "Your order is being prepared at the restaurant.",
+    "ready": "Your order is ready and waiting for driver pickup.",
+    "picked_up": "Driver has picked up your order and is on the way to you.",
+    "in_transit": "Your order is on the way! Expected delivery soon."
+}
+
 
 class SupportAgent:
     """Handles customer support interactions"""
     
-    def __init__(self):
+    def __init__(self, max_tickets: int = 10_000):
         self.order_service = OrderService()
-        self.support_tickets = {}
+        # Bounded so a long-running process doesn't keep every ticket
+        self.support_tickets = LRUCache(maxsize=max_tickets)
     
     def handle_order_inquiry(self, customer_phone: str, query: str) -> str:
         """
@@ -35,29 +60,18 @@ class SupportAgent:
             return "I don't see any recent orders for your number. Can you provide your order ID?"
         
         # Get latest active order
-        active_orders = [o for o in orders if o["status"] not in ["delivered", "completed", "cancelled"]]
+        order = next((o for o in orders if o["status"] not in _TERMINAL_STATUSES), None)
         
-        if not active_orders:
+        if order is None:
             return "Your last order was delivered successfully. Is there anything else I can help with?"
         
-        order = active_orders[0]
         order_id = order["order_id"]
         status = order["status"]
         
-        status_messages = {
-            "placed": "Your order has been placed and is being confirmed.",
-            "confirmed": "Your order is confirmed and will be prepared shortly.",
-            "preparing": "Your order is being prepared at the restaurant.",
-            "ready": "Your order is ready and waiting for driver pickup.",
-            "picked_up": "Driver has picked up your order and is on the way to you.",
-            "in_transit": "Your order is on the way! Expected delivery soon."
-        }
-        
-        response = f"Your order {order_id} status: {status_messages.get(status, status)}. "
+        response = f"Your order {order_id} status: {_STATUS_MESSAGES.get(status, status)}. "
         
         # Add items info
-        items = ", ".join([item['name'] for item in order['items']])
-        response += f"Items: {items}. Total: ₹{order['total']}."
+        response += f"Items: {self.order_service.get_items_summary(order_id)}. Total: ₹{order['total']}."
         
         return response
     
@@ -82,7 +96,7 @@ class SupportAgent:
         refund_amount = amount if amount else order["total"]
         
         # Create refund record
-        refund_id = f"REF{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        refund_id = f"REF{_ID_SHARD}{next(_refund_counter):X}"
         
         refund = {
             "refund_id": refund_id,
@@ -93,8 +107,10 @@ class SupportAgent:
             "processed_at": datetime.now().isoformat()
         }
         
-        logger.info(f"💰 Refund processed: {refund_id} - ₹{refund_amount} for order {order_id}")
-        logger.info(f"   Reason: {reason}")
+        logger.info(
+            "💰 Refund processed: %s - ₹%s for order %s (reason: %s)",
+            refund_id, refund_amount, order_id, reason
+        )
         
         return {
             "success": True,
@@ -115,7 +131,7 @@ class SupportAgent:
         Returns:
             Ticket information
         """
-        ticket_id = f"TKT{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        ticket_id = f"TKT{_ID_SHARD}{next(_ticket_counter):X}"
         
         ticket = {
             "ticket_id": ticket_id,
@@ -129,8 +145,10 @@ class SupportAgent:
         
         self.support_tickets[ticket_id] = ticket
         
-        logger.info(f"🎫 Support ticket created: {ticket_id}")
-        logger.info(f"   Order: {order_id}, Complaint: {complaint}")
+        logger.info(
+            "🎫 Support ticket created: %s - Order: %s, Complaint: %s",
+            ticket_id, order_id, complaint
+        )
         
         return {
             "success": True,
@@ -149,10 +167,9 @@ class SupportAgent:
         Returns:
             Cancellation result
         """
-        success = self.order_service.cancel_order(order_id, reason)
+        order = self.order_service.cancel_order(order_id, reason)
         
-        if success:
-            order = self.order_service.get_order(order_id)
+        if order:
             return {
                 "success": True,
                 "message": f"Order {order_id} has been cancelled. Refund of ₹{order['total']} will be processed."
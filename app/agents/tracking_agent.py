@@ -29,12 +29,13 @@ class TrackingAgent:
         Returns:
             Tracking information with ETA
         """
-        order = self.order_service.get_order(order_id)
+        order, delivery = self.order_service.get_order_with_delivery(
+            order_id,
+            self.driver_service
+        )
         if not order:
             return {"error": "Order not found"}
         
-        delivery = self.driver_service.get_delivery_status(order_id)
-        
         if not delivery:
             return {
                 "order_id": order_id,
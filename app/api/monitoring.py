@@ -2,24 +2,48 @@
 Monitoring and Metrics API
 System health and performance monitoring
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from datetime import datetime
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, generate_latest
 import logging
-import psutil
 import os
+import time
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Track metrics
-metrics = {
-    "calls_total": 0,
-    "calls_success": 0,
-    "calls_failed": 0,
-    "orders_total": 0,
-    "orders_completed": 0,
-    "start_time": datetime.now().isoformat()
-}
+# Process start, for uptime math
+_MONOTONIC_START = time.monotonic()
+
+# (second, ISO string) of the last formatted timestamp
+_now_iso_cache = (0, "")
+
+# Track metrics (CPU, memory and start time come from the default
+# registry's process collector, read from /proc at scrape time)
+calls_total = Counter("calls_total", "Calls handled, by result", ["result"])
+orders_total = Counter("orders_total", "Orders placed")
+orders_completed = Counter("orders_completed_total", "Orders completed")
+
+# Bind label children up front so both series are exported from zero
+_calls_success = calls_total.labels("success")
+_calls_failed = calls_total.labels("failed")
+
+
+def _now_iso_cached() -> str:
+    """
+    Get the current local time as ISO 8601, formatted once per second
+    
+    Returns:
+        Timestamp string with whole-second precision
+    """
+    global _now_iso_cache
+    
+    second = int(time.time())
+    if _now_iso_cache[0] != second:
+        # Swap in one tuple so readers never see a mismatched pair
+        _now_iso_cache = (second, datetime.fromtimestamp(second).isoformat())
+    
+    return _now_iso_cache[1]
 
 
 @router.get("/health")
@@ -27,41 +51,15 @@ async def health_check():
     """System health check"""
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "uptime_seconds": (datetime.now() - datetime.fromisoformat(metrics["start_time"])).total_seconds()
+        "timestamp": _now_iso_cached(),
+        "uptime_seconds": time.monotonic() - _MONOTONIC_START
     }
 
 
 @router.get("/metrics")
 async def get_metrics():
-    """Get system metrics"""
-    # System metrics
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    memory = psutil.virtual_memory()
-    disk = psutil.disk_usage('/')
-    
-    return {
-        "timestamp": datetime.now().isoformat(),
-        "system": {
-            "cpu_percent": cpu_percent,
-            "memory_used_percent": memory.percent,
-            "memory_available_mb": memory.available / 1024 / 1024,
-            "disk_used_percent": disk.percent,
-            "disk_free_gb": disk.free / 1024 / 1024 / 1024
-        },
-        "calls": {
-            "total": metrics["calls_total"],
-            "success": metrics["calls_success"],
-            "failed": metrics["calls_failed"],
-            "success_rate": (metrics["calls_success"] / metrics["calls_total"] * 100) if metrics["calls_total"] > 0 else 0
-        },
-        "orders": {
-            "total": metrics["orders_total"],
-            "completed": metrics["orders_completed"],
-            "completion_rate": (metrics["orders_completed"] / metrics["orders_total"] * 100) if metrics["orders_total"] > 0 else 0
-        },
-        "uptime_seconds": (datetime.now() - datetime.fromisoformat(metrics["start_time"])).total_seconds()
-    }
+    """Export metrics in Prometheus text format"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 @router.get("/status")
@@ -88,15 +86,11 @@ async def system_status():
 
 def increment_call_metric(success: bool = True):
     """Increment call metrics"""
-    metrics["calls_total"] += 1
-    if success:
-        metrics["calls_success"] += 1
-    else:
-        metrics["calls_failed"] += 1
+    (_calls_success if success else _calls_failed).inc()
 
 
 def increment_order_metric(completed: bool = False):
     """Increment order metrics"""
-    metrics["orders_total"] += 1
+    orders_total.inc()
     if completed:
-        metrics["orders_completed"] += 1
+        orders_completed.inc()
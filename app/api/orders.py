@@ -2,8 +2,9 @@
 Complete Order Fulfillment API
 Orchestrates restaurant, driver, and order services
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from functools import lru_cache
 from typing import List, Dict, Any
 import logging
 
@@ -17,13 +18,37 @@ from app.agents.post_delivery_agent import PostDeliveryAgent
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize services
-order_service = OrderService()
-restaurant_service = RestaurantService()
-driver_service = DriverService()
-tracking_agent = TrackingAgent()
-support_agent = SupportAgent()
-post_delivery_agent = PostDeliveryAgent()
+
+# Services are built on first use and shared afterwards; tests can swap
+# them via app.dependency_overrides
+@lru_cache(maxsize=1)
+def get_order_service() -> OrderService:
+    return OrderService()
+
+
+@lru_cache(maxsize=1)
+def get_restaurant_service() -> RestaurantService:
+    return RestaurantService()
+
+
+@lru_cache(maxsize=1)
+def get_driver_service() -> DriverService:
+    return DriverService()
+
+
+@lru_cache(maxsize=1)
+def get_tracking_agent() -> TrackingAgent:
+    return TrackingAgent()
+
+
+@lru_cache(maxsize=1)
+def get_support_agent() -> SupportAgent:
+    return SupportAgent()
+
+
+@lru_cache(maxsize=1)
+def get_post_delivery_agent() -> PostDeliveryAgent:
+    return PostDeliveryAgent()
 
 
 class OrderRequest(BaseModel):
@@ -40,7 +65,12 @@ class FeedbackRequest(BaseModel):
 
 
 @router.post("/order/create")
-async def create_order(request: OrderRequest):
+async def create_order(
+    request: OrderRequest,
+    order_service: OrderService = Depends(get_order_service),
+    restaurant_service: RestaurantService = Depends(get_restaurant_service),
+    driver_service: DriverService = Depends(get_driver_service)
+):
     """Create and process complete order with restaurant and driver"""
     try:
         # 1. Create order
@@ -53,13 +83,10 @@ async def create_order(request: OrderRequest):
         
         order_id = order["order_id"]
         
-        # 2. Notify restaurant
+        # 2-3. Notify restaurant and assign driver. Both are quick in-memory
+        # updates, called directly so the driver check-and-claim stays atomic
+        # on the event loop
         restaurant_result = restaurant_service.notify_restaurant(order_id, order)
-        
-        if restaurant_result["success"]:
-            order_service.update_status(order_id, OrderStatus.PREPARING)
-        
-        # 3. Assign driver
         driver_result = driver_service.assign_driver(
             order_id=order_id,
             driver_id="drv_001",  # Auto-assign first available
@@ -67,6 +94,9 @@ async def create_order(request: OrderRequest):
             customer_location={"address": request.address}
         )
         
+        if restaurant_result["success"]:
+            order_service.update_status(order_id, OrderStatus.PREPARING)
+        
         if driver_result["success"]:
             order_service.update_status(order_id, OrderStatus.CONFIRMED)
         
@@ -85,7 +115,10 @@ async def create_order(request: OrderRequest):
 
 
 @router.get("/order/{order_id}/track")
-async def track_order(order_id: str):
+async def track_order(
+    order_id: str,
+    tracking_agent: TrackingAgent = Depends(get_tracking_agent)
+):
     """Get real-time order tracking"""
     tracking = tracking_agent.get_order_tracking(order_id)
     
@@ -96,7 +129,10 @@ async def track_order(order_id: str):
 
 
 @router.get("/order/{order_id}/status")
-async def get_order_status(order_id: str):
+async def get_order_status(
+    order_id: str,
+    order_service: OrderService = Depends(get_order_service)
+):
     """Get order status"""
     order = order_service.get_order(order_id)
     
@@ -107,7 +143,11 @@ async def get_order_status(order_id: str):
 
 
 @router.post("/order/{order_id}/cancel")
-async def cancel_order(order_id: str, reason: str):
+async def cancel_order(
+    order_id: str,
+    reason: str,
+    support_agent: SupportAgent = Depends(get_support_agent)
+):
     """Cancel order"""
     result = support_agent.cancel_order_request(order_id, reason)
     
@@ -118,21 +158,34 @@ async def cancel_order(order_id: str, reason: str):
 
 
 @router.post("/support/inquiry")
-async def handle_inquiry(customer_phone: str, query: str):
+async def handle_inquiry(
+    customer_phone: str,
+    query: str,
+    support_agent: SupportAgent = Depends(get_support_agent)
+):
     """Handle customer support inquiry"""
     response = support_agent.handle_order_inquiry(customer_phone, query)
     return {"response": response}
 
 
 @router.post("/support/complaint")
-async def create_complaint(customer_phone: str, order_id: str, complaint: str):
+async def create_complaint(
+    customer_phone: str,
+    order_id: str,
+    complaint: str,
+    support_agent: SupportAgent = Depends(get_support_agent)
+):
     """Create support complaint"""
     result = support_agent.create_complaint(customer_phone, order_id, complaint)
     return result
 
 
 @router.post("/support/refund")
-async def process_refund(order_id: str, reason: str):
+async def process_refund(
+    order_id: str,
+    reason: str,
+    support_agent: SupportAgent = Depends(get_support_agent)
+):
     """Process refund"""
     result = support_agent.process_refund(order_id, reason)
     
@@ -143,7 +196,10 @@ async def process_refund(order_id: str, reason: str):
 
 
 @router.post("/feedback")
-async def submit_feedback(request: FeedbackRequest):
+async def submit_feedback(
+    request: FeedbackRequest,
+    post_delivery_agent: PostDeliveryAgent = Depends(get_post_delivery_agent)
+):
     """Submit post-delivery feedback"""
     result = post_delivery_agent.collect_feedback(
         order_id=request.order_id,
@@ -158,14 +214,22 @@ async def submit_feedback(request: FeedbackRequest):
 
 
 @router.get("/customer/{phone}/orders")
-async def get_customer_orders(phone: str):
+async def get_customer_orders(
+    phone: str,
+    order_service: OrderService = Depends(get_order_service)
+):
     """Get all orders for customer"""
     orders = order_service.get_customer_orders(phone)
     return {"orders": orders, "count": len(orders)}
 
 
 @router.post("/driver/{driver_id}/location")
-async def update_driver_location(driver_id: str, lat: float, lng: float):
+async def update_driver_location(
+    driver_id: str,
+    lat: float,
+    lng: float,
+    driver_service: DriverService = Depends(get_driver_service)
+):
     """Update driver location"""
     success = driver_service.update_driver_location(driver_id, {"lat": lat, "lng": lng})
     
@@ -176,7 +240,11 @@ async def update_driver_location(driver_id: str, lat: float, lng: float):
 
 
 @router.post("/order/{order_id}/picked-up")
-async def mark_picked_up(order_id: str):
+async def mark_picked_up(
+    order_id: str,
+    order_service: OrderService = Depends(get_order_service),
+    driver_service: DriverService = Depends(get_driver_service)
+):
     """Mark order as picked up"""
     success = driver_service.mark_picked_up(order_id)
     
@@ -188,7 +256,10 @@ async def mark_picked_up(order_id: str):
 
 
 @router.post("/order/{order_id}/delivered")
-async def mark_delivered(order_id: str):
+async def mark_delivered(
+    order_id: str,
+    tracking_agent: TrackingAgent = Depends(get_tracking_agent)
+):
     """Mark order as delivered"""
     success = tracking_agent.confirm_delivery(order_id)
     
@@ -31,10 +31,10 @@ async def get_customer_by_phone(
 
 
 @router.get("/id/{customer_id}")
-async def get_customer(customer_id: str, db: AsyncSession = Depends(get_db)):
-    """Get customer by ID"""
+async def get_customer(customer_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    """Get customer by ID (malformed IDs are rejected with 422 before any query)"""
     result = await db.execute(
-        select(Customer).where(Customer.id == uuid.UUID(customer_id))
+        select(Customer).where(Customer.id == customer_id)
     )
     customer = result.scalars().first()
     
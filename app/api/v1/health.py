@@ -3,14 +3,18 @@ Health Check API
 System health and readiness endpoints
 """
 from fastapi import APIRouter, Depends
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from redis import asyncio as aioredis
 
 from app.db.database import get_db
 from app.core.config import settings
+from app.services.state_manager import state_manager
 
 router = APIRouter()
 
+# Built once so SQLAlchemy's compiled-statement cache is reused by every probe
+_PING_SQL = text("SELECT 1")
+
 
 @router.get("/")
 async def health_check():
@@ -27,12 +31,10 @@ async def readiness_check(db: AsyncSession = Depends(get_db)):
     """Readiness check with database connectivity"""
     try:
         # Check database
-        await db.execute("SELECT 1")
+        await db.execute(_PING_SQL)
         
-        # Check Redis
-        redis_client = aioredis.from_url(settings.REDIS_URL)
-        await redis_client.ping()
-        await redis_client.close()
+        # Check Redis (reuses the state manager's pooled client)
+        await state_manager.ping()
         
         return {
             "status": "ready",
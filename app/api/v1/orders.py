@@ -3,46 +3,107 @@ Orders API
 Endpoints for order management
 """
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, ConfigDict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 import uuid
 
 from app.db.database import get_db
-from app.db.models import Order, Customer, OrderStatus
+from app.db.models import Order, Customer, OrderStatus, PaymentStatus
 
 router = APIRouter()
 
 
-@router.get("/")
+# Response schemas: read straight from ORM objects/rows and serialized by
+# pydantic-core, skipping jsonable_encoder's per-field Python walk
+class OrderSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: uuid.UUID
+    order_number: str
+    customer_id: uuid.UUID
+    status: OrderStatus
+    total: float
+    created_at: Optional[datetime] = None
+
+
+class OrderOut(OrderSummary):
+    restaurant_id: uuid.UUID
+    driver_id: Optional[uuid.UUID] = None
+    items: List[Dict[str, Any]]
+    delivery_address: Dict[str, Any]
+    delivery_instructions: Optional[str] = None
+    subtotal: float
+    tax: Optional[float] = None
+    delivery_fee: Optional[float] = None
+    discount: Optional[float] = None
+    payment_status: Optional[PaymentStatus] = None
+    estimated_prep_time: Optional[int] = None
+    estimated_delivery_time: Optional[datetime] = None
+    placed_at: Optional[datetime] = None
+    confirmed_at: Optional[datetime] = None
+    ready_at: Optional[datetime] = None
+    picked_up_at: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
+    rating: Optional[int] = None
+    feedback: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
+class OrderListResponse(BaseModel):
+    orders: List[OrderSummary]
+
+
+class OrderResponse(BaseModel):
+    order: OrderOut
+
+# Columns returned by list_orders (full rows are served by get_order)
+_ORDER_LIST_COLUMNS = (
+    Order.id,
+    Order.order_number,
+    Order.customer_id,
+    Order.status,
+    Order.total,
+    Order.created_at,
+)
+
+
+@router.get("/", response_model=OrderListResponse)
 async def list_orders(
-    customer_id: str = None,
+    customer_id: Optional[uuid.UUID] = None,
     status: OrderStatus = None,
     limit: int = 20,
     db: AsyncSession = Depends(get_db)
 ):
-    """List orders with filters"""
-    query = select(Order)
+    """
+    List orders with filters
+    
+    Backed by idx_orders_customer_status_created (customer_id, status,
+    created_at DESC), so filtered queries read the newest rows straight
+    from the index instead of scanning and sorting.
+    """
+    query = select(*_ORDER_LIST_COLUMNS)
     
     if customer_id:
-        query = query.where(Order.customer_id == uuid.UUID(customer_id))
+        query = query.where(Order.customer_id == customer_id)
     
     if status:
         query = query.where(Order.status == status)
     
-    query = query.limit(limit).order_by(Order.created_at.desc())
+    query = query.order_by(Order.created_at.desc()).limit(limit)
     
     result = await db.execute(query)
-    orders = result.scalars().all()
     
-    return {"orders": [order for order in orders]}
+    return {"orders": result.mappings().all()}
 
 
-@router.get("/{order_id}")
-async def get_order(order_id: str, db: AsyncSession = Depends(get_db)):
-    """Get order by ID"""
+@router.get("/{order_id}", response_model=OrderResponse)
+async def get_order(order_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    """Get order by ID (malformed IDs are rejected with 422 before any query)"""
     result = await db.execute(
-        select(Order).where(Order.id == uuid.UUID(order_id))
+        select(Order).where(Order.id == order_id)
     )
     order = result.scalars().first()
     
@@ -54,13 +115,13 @@ async def get_order(order_id: str, db: AsyncSession = Depends(get_db)):
 
 @router.post("/{order_id}/status")
 async def update_order_status(
-    order_id: str,
+    order_id: uuid.UUID,
     status: OrderStatus,
     db: AsyncSession = Depends(get_db)
 ):
     """Update order status"""
     result = await db.execute(
-        select(Order).where(Order.id == uuid.UUID(order_id))
+        select(Order).where(Order.id == order_id)
     )
     order = result.scalars().first()
     
@@ -2,14 +2,16 @@
 Twilio Voice Integration API
 Handles inbound/outbound calls and WebSocket media streaming
 """
-import json
 import logging
+import orjson
+from xml.sax.saxutils import escape
 from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect, Depends
-from fastapi.responses import Response
+from fastapi.responses import ORJSONResponse, Response
 from twilio.twiml.voice_response import VoiceResponse, Connect, Stream
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
-from app.db.database import get_db
+from app.api.forms import read_form_fields
+from app.db.database import get_autocommit_conn, get_db
 from app.services.call_service import CallService
 from app.services.audio_processor import AudioProcessor
 from app.core.config import settings
@@ -18,13 +20,64 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _build_incoming_twiml_template() -> str:
+    """
+    Render the inbound-call TwiML once, leaving str.format fields for the
+    per-call stream parameters
+    
+    Returns:
+        TwiML template with {call_sid} and {session_id} fields
+    """
+    response = VoiceResponse()
+    
+    # Recording consent (TRAI compliance)
+    if settings.RECORDING_CONSENT_REQUIRED:
+        response.say(
+            "This call may be recorded for quality and training purposes.",
+            voice="alice",
+            language="en-US"
+        )
+    
+    # Connect to WebSocket for media streaming
+    connect = Connect()
+    stream = Stream(url=f"wss://{settings.TWILIO_WEBHOOK_URL}/api/v1/twilio/media-stream")
+    stream.parameter(name="call_sid", value="__CALL_SID__")
+    stream.parameter(name="session_id", value="__SESSION_ID__")
+    connect.append(stream)
+    response.append(connect)
+    
+    return (
+        str(response)
+        .replace("{", "{{")
+        .replace("}", "}}")
+        .replace("__CALL_SID__", "{call_sid}")
+        .replace("__SESSION_ID__", "{session_id}")
+    )
+
+
+def _build_error_twiml() -> bytes:
+    """Render the fallback TwiML played when call setup fails"""
+    response = VoiceResponse()
+    response.say("We're sorry, but we're experiencing technical difficulties. Please try again later.")
+    response.hangup()
+    return str(response).encode()
+
+
+# TwiML is static apart from the stream parameters, so render it once
+_INCOMING_TWIML_TEMPLATE = _build_incoming_twiml_template()
+_ERROR_TWIML = _build_error_twiml()
+
+# Attribute-value escaping, matching what twilio.twiml emits
+_XML_ATTR_ENTITIES = {'"': "&quot;"}
+
+
 @router.post("/incoming")
 async def handle_incoming_call(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Handle incoming Twilio voice call
     Creates TwiML response with WebSocket connection
     """
-    form_data = await request.form()
+    form_data = await read_form_fields(request, "CallSid", "From", "To")
     call_sid = form_data.get("CallSid")
     from_number = form_data.get("From")
     to_number = form_data.get("To")
@@ -42,32 +95,15 @@ async def handle_incoming_call(request: Request, db: AsyncSession = Depends(get_
         )
         
         # Generate TwiML response
-        response = VoiceResponse()
-        
-        # Recording consent (TRAI compliance)
-        if settings.RECORDING_CONSENT_REQUIRED:
-            response.say(
-                "This call may be recorded for quality and training purposes.",
-                voice="alice",
-                language="en-US"
-            )
-        
-        # Connect to WebSocket for media streaming
-        connect = Connect()
-        stream = Stream(url=f"wss://{settings.TWILIO_WEBHOOK_URL}/api/v1/twilio/media-stream")
-        stream.parameter(name="call_sid", value=call_sid)
-        stream.parameter(name="session_id", value=str(session.id))
-        connect.append(stream)
-        response.append(connect)
-        
-        return Response(content=str(response), media_type="application/xml")
+        twiml = _INCOMING_TWIML_TEMPLATE.format(
+            call_sid=escape(str(call_sid), _XML_ATTR_ENTITIES),
+            session_id=session.id
+        )
+        return Response(content=twiml, media_type="application/xml")
         
     except Exception as e:
         logger.error(f"Error handling incoming call: {e}", exc_info=True)
-        response = VoiceResponse()
-        response.say("We're sorry, but we're experiencing technical difficulties. Please try again later.")
-        response.hangup()
-        return Response(content=str(response), media_type="application/xml")
+        return Response(content=_ERROR_TWIML, media_type="application/xml")
 
 
 @router.post("/outgoing")
@@ -88,18 +124,18 @@ async def initiate_outbound_call(
             context=context or {}
         )
         
-        return {
+        return ORJSONResponse({
             "status": "success",
             "call_sid": call.sid,
             "message": f"Call initiated to {to_number}"
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error initiating outbound call: {e}", exc_info=True)
-        return {
+        return ORJSONResponse({
             "status": "error",
             "message": str(e)
-        }
+        })
 
 
 @router.websocket("/media-stream")
@@ -114,14 +150,27 @@ async def handle_media_stream(websocket: WebSocket):
     session_id = None
     audio_processor = None
     
+    # Media payloads waiting to be handed to the audio processor together
+    pending_payloads = []
+    batch_frames = settings.AUDIO_BATCH_FRAMES
+    
     try:
         logger.info("WebSocket connection established")
         
         async for message in websocket.iter_text():
-            data = json.loads(message)
+            data = orjson.loads(message)
             event = data.get("event")
             
-            if event == "start":
+            # Media frames arrive every 20ms, so test for them first
+            if event == "media":
+                # Audio data received from caller
+                if audio_processor:
+                    pending_payloads.append(data["media"]["payload"])
+                    if len(pending_payloads) >= batch_frames:
+                        await audio_processor.process_inbound_audio_batch(pending_payloads)
+                        pending_payloads = []
+                    
+            elif event == "start":
                 # Stream started
                 call_sid = data["start"]["callSid"]
                 custom_params = data["start"].get("customParameters", {})
@@ -137,17 +186,9 @@ async def handle_media_stream(websocket: WebSocket):
                 )
                 await audio_processor.start()
                 
-            elif event == "media":
-                # Audio data received from caller
-                if audio_processor:
-                    payload = data["media"]["payload"]
-                    await audio_processor.process_inbound_audio(payload)
-                    
             elif event == "stop":
                 # Stream stopped
                 logger.info(f"Media stream stopped: {call_sid}")
-                if audio_processor:
-                    await audio_processor.stop()
                 break
                 
     except WebSocketDisconnect:
@@ -156,16 +197,23 @@ async def handle_media_stream(websocket: WebSocket):
         logger.error(f"Error in media stream: {e}", exc_info=True)
     finally:
         if audio_processor:
+            # Flush the partial batch, whether the stream stopped or the
+            # socket dropped, then shut down (cleanup() stops the processor)
+            if pending_payloads:
+                await audio_processor.process_inbound_audio_batch(pending_payloads)
             await audio_processor.cleanup()
 
 
 @router.post("/status")
-async def handle_call_status(request: Request, db: AsyncSession = Depends(get_db)):
+async def handle_call_status(
+    request: Request,
+    db: AsyncConnection = Depends(get_autocommit_conn)
+):
     """
     Handle Twilio call status callback
     Updates call session with final status and metrics
     """
-    form_data = await request.form()
+    form_data = await read_form_fields(request, "CallSid", "CallStatus", "CallDuration")
     call_sid = form_data.get("CallSid")
     call_status = form_data.get("CallStatus")
     call_duration = form_data.get("CallDuration")
@@ -180,20 +228,23 @@ async def handle_call_status(request: Request, db: AsyncSession = Depends(get_db
             duration=int(call_duration) if call_duration else None
         )
         
-        return {"status": "success"}
+        return ORJSONResponse({"status": "success"})
         
     except Exception as e:
         logger.error(f"Error updating call status: {e}", exc_info=True)
-        return {"status": "error", "message": str(e)}
+        return ORJSONResponse({"status": "error", "message": str(e)})
 
 
 @router.post("/recording")
-async def handle_recording_status(request: Request, db: AsyncSession = Depends(get_db)):
+async def handle_recording_status(
+    request: Request,
+    db: AsyncConnection = Depends(get_autocommit_conn)
+):
     """
     Handle Twilio recording status callback
     Stores recording URL in call session
     """
-    form_data = await request.form()
+    form_data = await read_form_fields(request, "CallSid", "RecordingUrl")
     call_sid = form_data.get("CallSid")
     recording_url = form_data.get("RecordingUrl")
     
@@ -206,8 +257,8 @@ async def handle_recording_status(request: Request, db: AsyncSession = Depends(g
             recording_url=recording_url
         )
         
-        return {"status": "success"}
+        return ORJSONResponse({"status": "success"})
         
     except Exception as e:
         logger.error(f"Error updating recording URL: {e}", exc_info=True)
-        return {"status": "error", "message": str(e)}
+        return ORJSONResponse({"status": "error", "message": str(e)})
@@ -2,13 +2,38 @@
 Voice API - Twilio Webhook Handler
 """
 from fastapi import APIRouter, Request
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 import logging
+from xml.sax.saxutils import escape
+from app.api.forms import read_form_fields
 from app.services.ai_handler import process_order_with_ai, get_order_summary
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# TwiML Voice Response with menu (identical for every caller)
+_INCOMING_TWIML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say voice="alice">Hello! Welcome to Food Delivery AI. I can help you order delicious food today!</Say>
+    <Say voice="alice">We have Margherita Pizza for 299 rupees, Chicken Burger for 199 rupees, French Fries for 99 rupees, Pasta Alfredo for 279 rupees, and Club Sandwich for 179 rupees.</Say>
+    <Gather input="speech" action="/api/voice/process" method="POST" speechTimeout="auto">
+        <Say voice="alice">What would you like to order?</Say>
+    </Gather>
+    <Say voice="alice">Sorry, I didn't hear anything. Goodbye!</Say>
+</Response>
+"""
+
+# TwiML for replies to the caller; only the spoken reply varies
+_PROCESS_TWIML_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say voice="alice">{response}</Say>
+    <Gather input="speech" action="/api/voice/process" method="POST" speechTimeout="auto">
+        <Say voice="alice">Anything else?</Say>
+    </Gather>
+    <Say voice="alice">Great! Your order total is being calculated. Thank you for calling!</Say>
+</Response>
+"""
+
 
 @router.post("/incoming")
 async def incoming_call(request: Request):
@@ -16,24 +41,13 @@ async def incoming_call(request: Request):
     logger.info("📞 Incoming call received!")
     
     # Get form data
-    form_data = await request.form()
+    form_data = await read_form_fields(request, 'From', 'CallSid')
     caller = form_data.get('From', 'Unknown')
     call_sid = form_data.get('CallSid', 'Unknown')
     
     logger.info(f"Caller: {caller}, CallSid: {call_sid}")
     
-    # TwiML Voice Response with menu
-    twiml = """<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say voice="alice">Hello! Welcome to Food Delivery AI. I can help you order delicious food today!</Say>
-    <Say voice="alice">We have Margherita Pizza for 299 rupees, Chicken Burger for 199 rupees, French Fries for 99 rupees, Pasta Alfredo for 279 rupees, and Club Sandwich for 179 rupees.</Say>
-    <Gather input="speech" action="/api/voice/process" method="POST" speechTimeout="auto">
-        <Say voice="alice">What would you like to order?</Say>
-    </Gather>
-    <Say voice="alice">Sorry, I didn't hear anything. Goodbye!</Say>
-</Response>
-"""
-    return PlainTextResponse(twiml, media_type="application/xml")
+    return PlainTextResponse(_INCOMING_TWIML, media_type="application/xml")
 
 
 @router.get("/incoming")
@@ -45,7 +59,7 @@ async def incoming_test():
 @router.post("/process")
 async def process_speech(request: Request):
     """Process speech input from caller"""
-    form_data = await request.form()
+    form_data = await read_form_fields(request, 'SpeechResult', 'CallSid')
     
     speech_result = form_data.get('SpeechResult', '')
     call_sid = form_data.get('CallSid', 'Unknown')
@@ -54,33 +68,25 @@ async def process_speech(request: Request):
     
     # Process with AI
     try:
-        ai_response = process_order_with_ai(call_sid, speech_result)
+        ai_response = await process_order_with_ai(call_sid, speech_result)
         logger.info(f"AI Response: {ai_response}")
     except Exception as e:
         logger.error(f"Error processing order: {e}", exc_info=True)
         ai_response = "I understood you want to order. Let me process that for you."
     
-    # TwiML response with AI
-    twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say voice="alice">{ai_response}</Say>
-    <Gather input="speech" action="/api/voice/process" method="POST" speechTimeout="auto">
-        <Say voice="alice">Anything else?</Say>
-    </Gather>
-    <Say voice="alice">Great! Your order total is being calculated. Thank you for calling!</Say>
-</Response>
-"""
+    # TwiML response with AI (escaped: the reply is free text)
+    twiml = _PROCESS_TWIML_TEMPLATE.format(response=escape(ai_response))
     return PlainTextResponse(twiml, media_type="application/xml")
 
 
 @router.post("/status")
 async def call_status(request: Request):
     """Handle call status callbacks"""
-    form_data = await request.form()
+    form_data = await read_form_fields(request, 'CallSid', 'CallStatus')
     
     call_sid = form_data.get('CallSid', 'Unknown')
     call_status = form_data.get('CallStatus', 'Unknown')
     
     logger.info(f"Call status update - CallSid: {call_sid}, Status: {call_status}")
     
-    return {"status": "received"}
+    return ORJSONResponse({"status": "received"})
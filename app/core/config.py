@@ -3,7 +3,7 @@ Core Configuration
 Loads environment variables and application settings
 """
 from typing import List
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
 
@@ -20,13 +20,16 @@ class Settings(BaseSettings):
     # API Server
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
-    API_WORKERS: int = 4
+    # Orders, support/feedback agents and Prometheus counters are still held
+    # per process, so stay on one worker until they are shared
+    API_WORKERS: int = 1
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
     
     # Database
     DATABASE_URL: str
     DATABASE_POOL_SIZE: int = 20
     DATABASE_MAX_OVERFLOW: int = 10
+    CUSTOMER_CACHE_TTL_SECONDS: int = 300  # Phone number -> customer id (DND is never cached)
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -50,6 +53,7 @@ class Settings(BaseSettings):
     ELEVENLABS_API_KEY: str = ""
     ELEVENLABS_VOICE_ID: str = "21m00Tcm4TlvDq8ikWAM"
     ELEVENLABS_MODEL: str = "eleven_turbo_v2"
+    ELEVENLABS_STREAMING_LATENCY: int = 3  # 0 (off) to 4 (fastest first audio)
     
     # Deepgram TTS (Fallback)
     DEEPGRAM_TTS_MODEL: str = "aura-asteria-en"
@@ -63,13 +67,21 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o-mini"
-    OPENAI_EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
     
     # Groq (FREE alternative)
     GROQ_API_KEY: str = ""
     GROQ_MODEL: str = "llama-3.3-70b-versatile"
     LLM_PROVIDER: str = "anthropic"  # anthropic, openai, or groq
     
+    # LLM/tool latency bounds (voice turns must not hang on a stalled provider)
+    LLM_TIMEOUT_SECONDS: float = 6.0
+    LLM_MAX_CONCURRENT_REQUESTS: int = 32
+    TOOL_TIMEOUT_SECONDS: float = 3.0
+    LLM_HEDGE_DELAY_MS: int = 800  # Start OpenAI alongside Claude if it hasn't answered by then
+    LLM_PRIMARY_FAILURE_THRESHOLD: int = 3  # Consecutive Claude failures before skipping it
+    LLM_PRIMARY_PROBE_INTERVAL_SECONDS: float = 30.0
+    
     # Qdrant
     QDRANT_URL: str = "http://localhost:6333"
     QDRANT_API_KEY: str = ""
@@ -144,6 +156,10 @@ class Settings(BaseSettings):
     CACHE_CUSTOMER_PROFILE_TTL: int = 300
     CACHE_MENU_ITEMS_TTL: int = 600
     CACHE_RESTAURANT_INFO_TTL: int = 300
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000
+    EMBEDDING_BATCH_WINDOW_MS: int = 10  # Coalesce embedding requests arriving this close together
+    EMBEDDING_BATCH_MAX: int = 128
     
     # Audio Processing
     AUDIO_SAMPLE_RATE: int = 16000
@@ -151,6 +167,8 @@ class Settings(BaseSettings):
     AUDIO_FORMAT: str = "mulaw"
     VAD_SILENCE_DURATION_MS: int = 1500
     INTERRUPT_DETECTION_THRESHOLD: float = 0.5
+    AUDIO_BATCH_FRAMES: int = 4  # 20ms Twilio media frames per STT push
+    AUDIO_DECODE_OFFLOAD_FRAMES: int = 50  # Batches this large decode off the event loop
     
     # Cost Optimization
     USE_CHEAPER_TTS_FOR_CONFIRMATIONS: bool = True
@@ -161,9 +179,13 @@ class Settings(BaseSettings):
     TEST_MODE: bool = False
     MOCK_EXTERNAL_APIS: bool = False
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # Frozen: settings are read-only after startup, so values bound at
+    # import time elsewhere can't go stale
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+        frozen=True
+    )
 
 
 # Global settings instance
@@ -2,12 +2,49 @@
 Logging Configuration
 """
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 from app.core.config import settings
 
+# Background thread that formats and writes queued records
+_listener: Optional[QueueListener] = None
+
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter that runs strftime at most once per second"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = None
+        self._cached_time = ""
+    
+    def formatTime(self, record, datefmt=None):
+        # datefmt has whole-second resolution, so records in the same
+        # second share one timestamp string
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = super().formatTime(record, datefmt)
+            self._cached_second = second
+        return self._cached_time
+
 
 def setup_logging():
-    """Setup simple logging"""
+    """
+    Setup simple logging
+    
+    Request code only enqueues records; formatting and the stdout write
+    happen on a QueueListener thread.
+    """
+    global _listener
+    
+    # The format below uses none of these, so skip collecting them for
+    # every record (the caller lookup walks the stack)
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging._srcfile = None
     
     # Configure standard logging
     log_level = getattr(logging, settings.LOG_LEVEL.upper())
@@ -17,16 +54,35 @@ def setup_logging():
     handler.setLevel(log_level)
     
     # Simple formatter
-    formatter = logging.Formatter(
+    formatter = _CachedTimeFormatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     
     handler.setFormatter(formatter)
     
+    # Replace any listener from a previous call
+    shutdown_logging()
+    
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    
     # Root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     root_logger.handlers.clear()  # Clear existing handlers
-    root_logger.addHandler(handler)
+    root_logger.addHandler(QueueHandler(log_queue))
+    
+    # One line per HTTP request is noise at call volume
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
@@ -0,0 +1,20 @@
+"""
+Event Loop Runtime
+"""
+import asyncio
+
+
+def install_uvloop() -> bool:
+    """
+    Make new event loops uvloop (libuv) loops when uvloop is available
+    
+    Returns:
+        True if uvloop was installed
+    """
+    try:
+        import uvloop
+    except ImportError:  # e.g. on Windows
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
@@ -1,8 +1,11 @@
 """
 Simple Menu Data
 """
+import re
+from types import MappingProxyType
 
-MENU = {
+# Read-only: search results and menu text below are precomputed from it
+MENU = MappingProxyType({
     "1": {
         "id": "1",
         "name": "Margherita Pizza",
@@ -38,31 +41,64 @@ MENU = {
         "price": 179.00,
         "category": "sandwich"
     }
+})
+
+
+# Field separator; never present in menu text, so a match can't span fields
+_FIELD_SEP = "\x00"
+
+# Lowercased name, description and category per item, joined into one
+# string and computed once since MENU is static
+_SEARCH_TEXT = [
+    (item, _FIELD_SEP.join((item['name'], item['description'], item['category'])).lower())
+    for item in MENU.values()
+]
+
+
+def _scan_menu(query: str):
+    """Substring-match an already lowercased query against every item"""
+    if _FIELD_SEP in query:
+        return []
+    return [item for item, text in _SEARCH_TEXT if query in text]
+
+
+# Results for every word appearing in the menu, so the common one-word
+# queries ("pizza", "chicken") are a dict lookup
+_WORD_RESULTS = {
+    word: _scan_menu(word)
+    for _, text in _SEARCH_TEXT
+    for word in re.findall(r"\w+", text)
 }
 
 
 def search_menu(query: str):
     """Search menu items by query"""
     query = query.lower()
-    results = []
     
-    for item_id, item in MENU.items():
-        if (query in item['name'].lower() or 
-            query in item['description'].lower() or 
-            query in item['category'].lower()):
-            results.append(item)
+    results = _WORD_RESULTS.get(query)
+    if results is None:
+        return _scan_menu(query)
     
-    return results
+    # Callers get their own list
+    return list(results)
 
 
-def get_menu_text():
-    """Get formatted menu text"""
+def _build_menu_text():
+    """Format the menu once for get_menu_text"""
     menu_text = "Our menu today:\n"
     for item in MENU.values():
         menu_text += f"- {item['name']}: {item['description']} - ₹{item['price']}\n"
     return menu_text
 
 
+_MENU_TEXT = _build_menu_text()
+
+
+def get_menu_text():
+    """Get formatted menu text"""
+    return _MENU_TEXT
+
+
 def get_item_by_id(item_id: str):
     """Get item by ID"""
     return MENU.get(item_id)
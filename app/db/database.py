@@ -2,7 +2,7 @@
 Database Configuration
 SQLAlchemy async setup with PostgreSQL
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
 
@@ -15,6 +15,9 @@ engine = create_async_engine(
     pool_pre_ping=True,
 )
 
+# Same pool, but every statement commits on its own
+autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -41,3 +44,12 @@ async def get_db() -> AsyncSession:
             raise
         finally:
             await session.close()
+
+
+async def get_autocommit_conn() -> AsyncConnection:
+    """
+    Dependency for getting a pooled connection in autocommit mode
+    For handlers that run single statements and need no session or transaction
+    """
+    async with autocommit_engine.connect() as conn:
+        yield conn
@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime, ForeignKey,
-    Text, Enum as SQLEnum, JSON, Index
+    Text, Enum as SQLEnum, JSON, Index, text
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
@@ -59,6 +59,26 @@ class AgentType(str, enum.Enum):
     POST_DELIVERY = "post_delivery"
 
 
+# Value -> member maps for request-path conversions (a dict hit instead of
+# the Enum(value) call machinery)
+CALL_DIRECTION_BY_VALUE = {member.value: member for member in CallDirection}
+AGENT_TYPE_BY_VALUE = {member.value: member for member in AgentType}
+
+
+# Column types, shared by every column of the same enum so each maps to one
+# named Postgres ENUM (names match SQLAlchemy's defaults for existing schemas)
+_ORDER_STATUS_ENUM = SQLEnum(OrderStatus, name="orderstatus")
+_PAYMENT_STATUS_ENUM = SQLEnum(PaymentStatus, name="paymentstatus")
+_DRIVER_STATUS_ENUM = SQLEnum(DriverStatus, name="driverstatus")
+_CALL_DIRECTION_ENUM = SQLEnum(CallDirection, name="calldirection")
+_AGENT_TYPE_ENUM = SQLEnum(AgentType, name="agenttype")
+
+
+# Empty JSONB defaults, filled in by Postgres on insert
+_EMPTY_JSONB_LIST = text("'[]'::jsonb")
+_EMPTY_JSONB_OBJECT = text("'{}'::jsonb")
+
+
 # Models
 class Customer(Base):
     """Customer model"""
@@ -69,9 +89,9 @@ class Customer(Base):
     email = Column(String(255), unique=True, nullable=True)
     first_name = Column(String(100))
     last_name = Column(String(100))
-    addresses = Column(JSONB, default=list)  # List of address objects
-    payment_methods = Column(JSONB, default=list)  # List of payment method IDs
-    preferences = Column(JSONB, default=dict)  # Dietary preferences, favorites
+    addresses = Column(JSONB, server_default=_EMPTY_JSONB_LIST)  # List of address objects
+    payment_methods = Column(JSONB, server_default=_EMPTY_JSONB_LIST)  # List of payment method IDs
+    preferences = Column(JSONB, server_default=_EMPTY_JSONB_OBJECT)  # Dietary preferences, favorites
     total_orders = Column(Integer, default=0)
     lifetime_value = Column(Float, default=0.0)
     dnd_registered = Column(Boolean, default=False)
@@ -84,7 +104,6 @@ class Customer(Base):
     call_sessions = relationship("CallSession", back_populates="customer")
     
     __table_args__ = (
-        Index('idx_customer_phone', 'phone_number'),
         Index('idx_customer_email', 'email'),
     )
 
@@ -99,7 +118,7 @@ class Restaurant(Base):
     email = Column(String(255))
     address = Column(JSONB, nullable=False)
     location = Column(JSONB, nullable=False)  # {lat, lng}
-    cuisine_types = Column(JSONB, default=list)
+    cuisine_types = Column(JSONB, server_default=_EMPTY_JSONB_LIST)
     operating_hours = Column(JSONB, nullable=False)
     average_prep_time = Column(Integer, default=30)  # minutes
     rating = Column(Float, default=0.0)
@@ -130,9 +149,9 @@ class MenuItem(Base):
     is_vegan = Column(Boolean, default=False)
     is_gluten_free = Column(Boolean, default=False)
     spice_level = Column(Integer, default=0)  # 0-5
-    allergens = Column(JSONB, default=list)
-    customization_options = Column(JSONB, default=list)
-    tags = Column(JSONB, default=list)  # For semantic search
+    allergens = Column(JSONB, server_default=_EMPTY_JSONB_LIST)
+    customization_options = Column(JSONB, server_default=_EMPTY_JSONB_LIST)
+    tags = Column(JSONB, server_default=_EMPTY_JSONB_LIST)  # For semantic search
     embedding = Column(JSONB, nullable=True)  # Vector embedding
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -168,8 +187,8 @@ class Order(Base):
     discount = Column(Float, default=0.0)
     total = Column(Float, nullable=False)
     
-    status = Column(SQLEnum(OrderStatus), default=OrderStatus.CART, nullable=False, index=True)
-    payment_status = Column(SQLEnum(PaymentStatus), default=PaymentStatus.PENDING)
+    status = Column(_ORDER_STATUS_ENUM, default=OrderStatus.CART, nullable=False, index=True)
+    payment_status = Column(_PAYMENT_STATUS_ENUM, default=PaymentStatus.PENDING)
     payment_method_id = Column(String(255))
     payment_intent_id = Column(String(255))
     
@@ -195,9 +214,13 @@ class Order(Base):
     driver = relationship("Driver", back_populates="orders")
     
     __table_args__ = (
-        Index('idx_order_customer', 'customer_id'),
-        Index('idx_order_status', 'status'),
-        Index('idx_order_number', 'order_number'),
+        # Serves list_orders: filter by customer/status, newest first
+        Index('idx_orders_customer_status_created', customer_id, status, created_at.desc()),
+        # Kitchen dashboards: a restaurant's open orders by status
+        Index(
+            'idx_order_active', restaurant_id, status,
+            postgresql_where=status.notin_([OrderStatus.COMPLETED, OrderStatus.CANCELLED])
+        ),
     )
 
 
@@ -211,7 +234,7 @@ class Driver(Base):
     first_name = Column(String(100), nullable=False)
     last_name = Column(String(100), nullable=False)
     
-    status = Column(SQLEnum(DriverStatus), default=DriverStatus.OFFLINE, nullable=False)
+    status = Column(_DRIVER_STATUS_ENUM, default=DriverStatus.OFFLINE, nullable=False)
     current_location = Column(JSONB)  # {lat, lng, accuracy, timestamp}
     vehicle_type = Column(String(50))
     vehicle_number = Column(String(50))
@@ -230,7 +253,6 @@ class Driver(Base):
     
     __table_args__ = (
         Index('idx_driver_status', 'status'),
-        Index('idx_driver_phone', 'phone_number'),
     )
 
 
@@ -244,7 +266,7 @@ class CallSession(Base):
     customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), nullable=True)
     order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=True)
     
-    direction = Column(SQLEnum(CallDirection), nullable=False)
+    direction = Column(_CALL_DIRECTION_ENUM, nullable=False)
     from_number = Column(String(20), nullable=False)
     to_number = Column(String(20), nullable=False)
     
@@ -252,7 +274,7 @@ class CallSession(Base):
     ended_at = Column(DateTime, nullable=True)
     duration = Column(Integer, nullable=True)  # seconds
     
-    initial_agent = Column(SQLEnum(AgentType), nullable=False)
+    initial_agent = Column(_AGENT_TYPE_ENUM, nullable=False)
     transcript = Column(Text)
     recording_url = Column(String(500))
     
@@ -268,15 +290,15 @@ class CallSession(Base):
     cost_twilio = Column(Float, default=0.0)
     total_cost = Column(Float, default=0.0)
     
-    metadata = Column(JSONB, default=dict)
+    extra_metadata = Column("metadata", JSONB, server_default=_EMPTY_JSONB_OBJECT)  # "metadata" is reserved by Declarative
     
     # Relationships
     customer = relationship("Customer", back_populates="call_sessions")
     agent_transitions = relationship("AgentTransition", back_populates="call_session")
     
     __table_args__ = (
-        Index('idx_call_sid', 'call_sid'),
         Index('idx_call_customer', 'customer_id'),
+        Index('idx_call_started', 'started_at'),
     )
 
 
@@ -287,8 +309,8 @@ class AgentTransition(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     call_session_id = Column(UUID(as_uuid=True), ForeignKey("call_sessions.id"), nullable=False)
     
-    from_agent = Column(SQLEnum(AgentType), nullable=True)
-    to_agent = Column(SQLEnum(AgentType), nullable=False)
+    from_agent = Column(_AGENT_TYPE_ENUM, nullable=True)
+    to_agent = Column(_AGENT_TYPE_ENUM, nullable=False)
     
     reason = Column(String(255))
     context_summary = Column(Text)
@@ -311,7 +333,7 @@ class FAQ(Base):
     question = Column(Text, nullable=False)
     answer = Column(Text, nullable=False)
     category = Column(String(100))
-    tags = Column(JSONB, default=list)
+    tags = Column(JSONB, server_default=_EMPTY_JSONB_LIST)
     embedding = Column(JSONB, nullable=True)
     
     is_active = Column(Boolean, default=True)
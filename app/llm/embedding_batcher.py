@@ -0,0 +1,98 @@
+"""
+Embedding Batcher
+Coalesces embedding requests from concurrent callers into one API call
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching front for an embedding endpoint
+    
+    Texts queued within a short window (or until max_batch is reached) go
+    out as a single request, so N concurrent single-text lookups cost one
+    round trip instead of N. Identical texts in a batch are embedded once.
+    """
+    
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Awaitable[List[List[float]]]],
+        window_seconds: float = 0.01,
+        max_batch: int = 128
+    ):
+        self.embed_batch = embed
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        
+        self._queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts as part of the next batch
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Embedding vectors, in the same order as texts
+        """
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._queue.put_nowait((text, future))
+            futures.append(future)
+        
+        return list(await asyncio.gather(*futures))
+    
+    async def close(self):
+        """Stop collecting batches (in-flight requests finish on their own)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+    
+    async def _run(self):
+        """Collect queued texts into batches and send each one off"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window_seconds
+            
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Keep collecting the next batch while this one is in flight
+            flush = asyncio.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+    
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Embed one batch and resolve its futures"""
+        index: Dict[str, int] = {}
+        for text, _ in batch:
+            index.setdefault(text, len(index))
+        
+        try:
+            vectors = await self.embed_batch(list(index))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for text, future in batch:
+            if not future.done():
+                future.set_result(vectors[index[text]])
@@ -5,16 +5,52 @@ Implements function calling and cost tracking
 """
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
+from time import perf_counter
+from typing import AsyncIterator, Dict, List, Any, Literal, Optional, Tuple
+import httpx
 from anthropic import Anthropic, AsyncAnthropic
 from openai import AsyncOpenAI
-import json
+import orjson
 
 from app.core.config import settings
-from app.tools.registry import ToolRegistry
+from app.llm.embedding_batcher import EmbeddingBatcher
+from app.llm.semantic_cache import SemanticCache
+from app.tools.registry import ToolRegistry, tool_registry as default_tool_registry
 
 logger = logging.getLogger(__name__)
 
+# Settings are frozen, so read per-call values once
+_TOOL_TIMEOUT_SECONDS = settings.TOOL_TIMEOUT_SECONDS
+
+# Tool result content for a timed-out call (identical every time)
+_TOOL_TIMEOUT_CONTENT = orjson.dumps({"error": "Tool timed out"}).decode()
+
+# Hedging and primary health
+_FALLBACK_ENABLED = settings.LLM_FALLBACK_ENABLED
+_HEDGE_DELAY_SECONDS = settings.LLM_HEDGE_DELAY_MS / 1000
+_PRIMARY_FAILURE_THRESHOLD = settings.LLM_PRIMARY_FAILURE_THRESHOLD
+_PRIMARY_PROBE_INTERVAL_SECONDS = settings.LLM_PRIMARY_PROBE_INTERVAL_SECONDS
+
+# Model tier per task hint: routing and order-taking turns are short,
+# classification-like replies the fallback model handles at ~1/20 the cost
+LLMTask = Literal["route", "order", "support", "complex"]
+_FAST_TASKS = frozenset(["route", "order"])
+
+# Anthropic prompt cache breakpoint (5 minute TTL, refreshed on each hit)
+_EPHEMERAL_CACHE = {"type": "ephemeral"}
+
+# USD per 1M tokens
+_CLAUDE_INPUT_PRICE = 3.0
+_CLAUDE_CACHE_WRITE_PRICE = 3.75
+_CLAUDE_CACHE_READ_PRICE = 0.30
+_CLAUDE_OUTPUT_PRICE = 15.0
+_OPENAI_INPUT_PRICE = 0.15
+_OPENAI_CACHED_INPUT_PRICE = 0.075
+_OPENAI_OUTPUT_PRICE = 0.60
+
+# Shared provider connection pool
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
 
 class LLMService:
     """
@@ -22,23 +58,57 @@ class LLMService:
     Supports function calling, streaming, and cost optimization
     """
     
-    def __init__(self):
-        # Initialize clients
-        self.claude_client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, tool_registry: Optional[ToolRegistry] = None):
+        # Initialize clients on one keep-alive HTTP/2 pool, so concurrent
+        # turns multiplex over warm connections instead of new TLS handshakes
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            limits=_HTTP_LIMITS,
+            timeout=settings.LLM_TIMEOUT_SECONDS
+        )
+        self.claude_client = AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            http_client=self.http_client
+        )
+        self.openai_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=self.http_client
+        )
         
         # Tool registry
-        self.tool_registry = ToolRegistry()
+        self.tool_registry = tool_registry or default_tool_registry
+        
+        # OpenAI-format tool lists by tool names (see _openai_tools_for)
+        self._openai_tools: Dict[Tuple[str, ...], List[Dict]] = {}
         
         # Cost tracking
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self.total_cached_input_tokens = 0
         self.total_cost = 0.0
         
         # Model selection
         self.primary_model = settings.ANTHROPIC_MODEL
         self.fallback_model = settings.OPENAI_MODEL
         self.use_fallback = False
+        self._primary_failures = 0
+        self._probe_task: Optional[asyncio.Task] = None
+        
+        # Concurrent embedding lookups share one API call
+        self.embedding_batcher = EmbeddingBatcher(
+            self._create_embeddings,
+            window_seconds=settings.EMBEDDING_BATCH_WINDOW_MS / 1000,
+            max_batch=settings.EMBEDDING_BATCH_MAX
+        )
+        
+        # Semantic response cache
+        self.semantic_cache: Optional[SemanticCache] = None
+        if settings.USE_CACHE_FOR_COMMON_RESPONSES:
+            self.semantic_cache = SemanticCache(
+                self.generate_embeddings,
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES
+            )
     
     async def generate_response(
         self,
@@ -47,7 +117,9 @@ class LLMService:
         tools: Optional[List[Dict]] = None,
         max_tokens: int = 4096,
         temperature: float = 0.7,
-        stream: bool = False
+        stream: bool = False,
+        cache_scope: Optional[str] = None,
+        task: LLMTask = "complex"
     ) -> Dict[str, Any]:
         """
         Generate LLM response with function calling support
@@ -59,33 +131,144 @@ class LLMService:
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             stream: Whether to stream response
+            cache_scope: Semantic cache partition; None bypasses the cache
+            task: Kind of turn; "route" and "order" use the cheaper model
         
         Returns:
             Response dict with message and tool calls
         """
-        try:
-            # Try Claude first
-            if not self.use_fallback:
-                return await self._generate_claude(
+        generate = self._generate_fast if task in _FAST_TASKS else self._generate
+        
+        query = messages[-1].get("content") if messages else None
+        if cache_scope and self.semantic_cache and not stream and isinstance(query, str):
+            return await self.semantic_cache.get_or_generate(
+                cache_scope,
+                query,
+                lambda: generate(
                     messages, system_prompt, tools, max_tokens, temperature, stream
                 )
-            else:
-                return await self._generate_openai(
-                    messages, system_prompt, tools, max_tokens, temperature, stream
+            )
+        
+        return await generate(
+            messages, system_prompt, tools, max_tokens, temperature, stream
+        )
+    
+    async def _generate_fast(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        tools: Optional[List[Dict]],
+        max_tokens: int,
+        temperature: float,
+        stream: bool
+    ) -> Dict[str, Any]:
+        """Generate response with the cheaper OpenAI model, falling back to Claude"""
+        try:
+            return await self._generate_openai(
+                messages, system_prompt, tools, max_tokens, temperature, stream
+            )
+        except Exception as e:
+            logger.error(f"Error generating fast-tier LLM response: {e}", exc_info=True)
+            return await self._generate(
+                messages, system_prompt, tools, max_tokens, temperature, stream
+            )
+    
+    async def _generate(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        tools: Optional[List[Dict]],
+        max_tokens: int,
+        temperature: float,
+        stream: bool
+    ) -> Dict[str, Any]:
+        """
+        Generate response with Claude, hedged with OpenAI
+        
+        Claude starts immediately. If it hasn't answered within the hedge
+        delay (or fails), OpenAI starts too and the first successful
+        response wins; the other request is cancelled. After repeated
+        Claude failures only OpenAI is used until a background probe sees
+        Claude healthy again.
+        """
+        args = (messages, system_prompt, tools, max_tokens, temperature, stream)
+        
+        if self.use_fallback:
+            return await self._generate_openai(*args)
+        
+        primary = asyncio.create_task(self._generate_claude(*args))
+        if not _FALLBACK_ENABLED:
+            try:
+                return await primary
+            except Exception as e:
+                logger.error(f"Error generating LLM response: {e}", exc_info=True)
+                raise
+        
+        pending = {primary}
+        hedge: Optional[asyncio.Task] = None
+        error: Optional[BaseException] = None
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=_HEDGE_DELAY_SECONDS if hedge is None else None,
+                    return_when=asyncio.FIRST_COMPLETED
                 )
                 
-        except Exception as e:
-            logger.error(f"Error generating LLM response: {e}", exc_info=True)
+                for task in done:
+                    if task.exception() is None:
+                        if task is primary:
+                            self._primary_failures = 0
+                        return task.result()
+                    
+                    error = task.exception()
+                    logger.error(f"Error generating LLM response: {error}", exc_info=error)
+                    if task is primary:
+                        self._record_primary_failure()
+                
+                # Claude is slow or failed: race OpenAI against it
+                if hedge is None:
+                    logger.warning("Hedging Claude request with OpenAI")
+                    hedge = asyncio.create_task(self._generate_openai(*args))
+                    pending.add(hedge)
             
-            # Fallback to OpenAI if Claude fails
-            if not self.use_fallback:
-                logger.warning("Falling back to OpenAI")
-                self.use_fallback = True
-                return await self._generate_openai(
-                    messages, system_prompt, tools, max_tokens, temperature, stream
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+    
+    def _record_primary_failure(self):
+        """Count a Claude failure; skip Claude once they pile up"""
+        self._primary_failures += 1
+        if self._primary_failures < _PRIMARY_FAILURE_THRESHOLD or self.use_fallback:
+            return
+        
+        logger.warning(
+            f"Claude failed {self._primary_failures} times in a row, using OpenAI until it recovers"
+        )
+        self.use_fallback = True
+        self._probe_task = asyncio.create_task(self._probe_primary())
+    
+    async def _probe_primary(self):
+        """Ping Claude periodically and switch back once it answers"""
+        while self.use_fallback:
+            await asyncio.sleep(_PRIMARY_PROBE_INTERVAL_SECONDS)
+            try:
+                await self.claude_client.messages.create(
+                    model=self.primary_model,
+                    max_tokens=1,
+                    messages=[{"role": "user", "content": "ping"}]
                 )
+            except Exception as e:
+                logger.info(f"Claude still unavailable: {e}")
+                continue
             
-            raise
+            logger.info("Claude recovered, switching back from OpenAI")
+            self._primary_failures = 0
+            self.use_fallback = False
     
     async def _generate_claude(
         self,
@@ -98,14 +281,36 @@ class LLMService:
     ) -> Dict[str, Any]:
         """Generate response using Claude"""
         
-        start_time = asyncio.get_event_loop().time()
+        start_time = perf_counter()
         
-        # Prepare request
+        request_params = self._claude_request(
+            messages, system_prompt, tools, max_tokens, temperature
+        )
+        
+        # Make API call
+        if stream:
+            response = await self._stream_claude(request_params)
+        else:
+            response = await self.claude_client.messages.create(**request_params)
+        
+        return self._claude_result(response, start_time)
+    
+    def _claude_request(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        tools: Optional[List[Dict]],
+        max_tokens: int,
+        temperature: float
+    ) -> Dict[str, Any]:
+        """Build Claude request parameters"""
+        # Claude's prefix order is tools -> system -> messages, so one
+        # breakpoint after the static system prompt caches both
         request_params = {
             "model": self.primary_model,
             "max_tokens": max_tokens,
             "temperature": temperature,
-            "system": system_prompt,
+            "system": [{"type": "text", "text": system_prompt, "cache_control": _EPHEMERAL_CACHE}],
             "messages": messages,
         }
         
@@ -113,14 +318,12 @@ class LLMService:
         if tools:
             request_params["tools"] = tools
         
-        # Make API call
-        if stream:
-            response = await self._stream_claude(request_params)
-        else:
-            response = await self.claude_client.messages.create(**request_params)
-        
+        return request_params
+    
+    def _claude_result(self, response: Any, start_time: float) -> Dict[str, Any]:
+        """Convert a Claude message into a response dict and track its cost"""
         # Calculate latency
-        latency = asyncio.get_event_loop().time() - start_time
+        latency = perf_counter() - start_time
         
         # Extract response
         result = {
@@ -143,16 +346,24 @@ class LLMService:
                     "input": content.input
                 })
         
-        # Calculate cost
-        input_cost = (response.usage.input_tokens / 1_000_000) * 3.0  # $3 per 1M tokens
-        output_cost = (response.usage.output_tokens / 1_000_000) * 15.0  # $15 per 1M tokens
+        # Calculate cost (input_tokens excludes cache writes and reads)
+        usage = response.usage
+        cache_write_tokens = getattr(usage, "cache_creation_input_tokens", None) or 0
+        cache_read_tokens = getattr(usage, "cache_read_input_tokens", None) or 0
+        input_cost = (
+            usage.input_tokens * _CLAUDE_INPUT_PRICE
+            + cache_write_tokens * _CLAUDE_CACHE_WRITE_PRICE
+            + cache_read_tokens * _CLAUDE_CACHE_READ_PRICE
+        ) / 1_000_000
+        output_cost = (usage.output_tokens / 1_000_000) * _CLAUDE_OUTPUT_PRICE
         total_cost = input_cost + output_cost
         
         result["cost"] = total_cost
         
         # Update tracking
-        self.total_input_tokens += response.usage.input_tokens
-        self.total_output_tokens += response.usage.output_tokens
+        self.total_input_tokens += usage.input_tokens + cache_write_tokens + cache_read_tokens
+        self.total_output_tokens += usage.output_tokens
+        self.total_cached_input_tokens += cache_read_tokens
         self.total_cost += total_cost
         
         logger.info(f"Claude response generated in {latency:.3f}s, cost: ${total_cost:.4f}")
@@ -160,11 +371,78 @@ class LLMService:
         return result
     
     async def _stream_claude(self, request_params: Dict) -> Any:
-        """Stream Claude response"""
-        # TODO: Implement streaming
-        # For now, use non-streaming
-        response = await self.claude_client.messages.create(**request_params)
-        return response
+        """Receive a Claude response over the streaming API and return the final message"""
+        async with self.claude_client.messages.stream(**request_params) as stream:
+            return await stream.get_final_message()
+    
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        tools: Optional[List[Dict]] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        task: LLMTask = "complex"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an LLM response as it is generated
+        
+        Yields {"type": "text", "text": ...} deltas, then one
+        {"type": "response", "response": ...} event with the same dict
+        generate_response returns. Fast-tier tasks, and turns where Claude
+        fails before sending any text or is marked down, are answered by
+        OpenAI in a single text event.
+        
+        Args:
+            messages: Conversation history
+            system_prompt: System instructions for the agent
+            tools: Available tools/functions
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            task: Kind of turn; "route" and "order" use the cheaper model
+        
+        Yields:
+            Text deltas followed by the complete response
+        """
+        if task in _FAST_TASKS:
+            result = await self._generate_fast(
+                messages, system_prompt, tools, max_tokens, temperature, False
+            )
+            if result["message"]:
+                yield {"type": "text", "text": result["message"]}
+            yield {"type": "response", "response": result}
+            return
+        
+        if not self.use_fallback:
+            start_time = perf_counter()
+            request_params = self._claude_request(
+                messages, system_prompt, tools, max_tokens, temperature
+            )
+            streamed = False
+            
+            try:
+                async with self.claude_client.messages.stream(**request_params) as stream:
+                    async for text in stream.text_stream:
+                        streamed = True
+                        yield {"type": "text", "text": text}
+                    response = await stream.get_final_message()
+                
+                self._primary_failures = 0
+                yield {"type": "response", "response": self._claude_result(response, start_time)}
+                return
+                
+            except Exception as e:
+                logger.error(f"Error streaming LLM response: {e}", exc_info=True)
+                self._record_primary_failure()
+                if streamed or not _FALLBACK_ENABLED:
+                    raise
+        
+        result = await self._generate_openai(
+            messages, system_prompt, tools, max_tokens, temperature, False
+        )
+        if result["message"]:
+            yield {"type": "text", "text": result["message"]}
+        yield {"type": "response", "response": result}
     
     async def _generate_openai(
         self,
@@ -177,7 +455,7 @@ class LLMService:
     ) -> Dict[str, Any]:
         """Generate response using OpenAI (fallback)"""
         
-        start_time = asyncio.get_event_loop().time()
+        start_time = perf_counter()
         
         # Prepare messages with system prompt
         openai_messages = [{"role": "system", "content": system_prompt}] + messages
@@ -192,13 +470,13 @@ class LLMService:
         
         # Add tools if provided
         if tools:
-            request_params["tools"] = self._convert_tools_to_openai_format(tools)
+            request_params["tools"] = self._openai_tools_for(tools)
         
         # Make API call
         response = await self.openai_client.chat.completions.create(**request_params)
         
         # Calculate latency
-        latency = asyncio.get_event_loop().time() - start_time
+        latency = perf_counter() - start_time
         
         # Extract response
         message = response.choices[0].message
@@ -218,25 +496,47 @@ class LLMService:
                 result["tool_calls"].append({
                     "id": tool_call.id,
                     "name": tool_call.function.name,
-                    "input": json.loads(tool_call.function.arguments)
+                    "input": orjson.loads(tool_call.function.arguments)
                 })
         
-        # Calculate cost
-        input_cost = (response.usage.prompt_tokens / 1_000_000) * 0.15
-        output_cost = (response.usage.completion_tokens / 1_000_000) * 0.60
+        # Calculate cost (OpenAI caches long prompt prefixes automatically;
+        # cached_tokens is part of prompt_tokens)
+        usage = response.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        input_cost = (
+            (usage.prompt_tokens - cached_tokens) * _OPENAI_INPUT_PRICE
+            + cached_tokens * _OPENAI_CACHED_INPUT_PRICE
+        ) / 1_000_000
+        output_cost = (usage.completion_tokens / 1_000_000) * _OPENAI_OUTPUT_PRICE
         total_cost = input_cost + output_cost
         
         result["cost"] = total_cost
         
         # Update tracking
-        self.total_input_tokens += response.usage.prompt_tokens
-        self.total_output_tokens += response.usage.completion_tokens
+        self.total_input_tokens += usage.prompt_tokens
+        self.total_output_tokens += usage.completion_tokens
+        self.total_cached_input_tokens += cached_tokens
         self.total_cost += total_cost
         
         logger.info(f"OpenAI response generated in {latency:.3f}s, cost: ${total_cost:.4f}")
         
         return result
     
+    def _openai_tools_for(self, tools: List[Dict]) -> List[Dict]:
+        """
+        OpenAI-format tools, converted once per tool set
+        
+        Tool definitions are static per name, so the names identify the set;
+        reusing one list also keeps the serialized prefix byte-identical for
+        OpenAI's prompt cache.
+        """
+        key = tuple(tool["name"] for tool in tools)
+        openai_tools = self._openai_tools.get(key)
+        if openai_tools is None:
+            openai_tools = self._openai_tools[key] = self._convert_tools_to_openai_format(tools)
+        return openai_tools
+    
     def _convert_tools_to_openai_format(self, tools: List[Dict]) -> List[Dict]:
         """Convert Claude tool format to OpenAI format"""
         openai_tools = []
@@ -257,59 +557,126 @@ class LLMService:
         session_context: Dict
     ) -> List[Dict]:
         """
-        Execute tool calls and return results
+        Execute tool calls concurrently and return results
+        
+        Independent calls run in parallel. A call may list prerequisite
+        tool call ids in "depends_on"; it then waits for those calls to
+        finish before it starts.
+        
+        Args:
+            tool_calls: List of tool calls from LLM
+            session_context: Current session context
+        
+        Returns:
+            List of tool results, in the same order as tool_calls
+        """
+        return list(await asyncio.gather(*self.schedule_tool_calls(tool_calls, session_context)))
+    
+    def schedule_tool_calls(
+        self,
+        tool_calls: List[Dict],
+        session_context: Dict
+    ) -> List[asyncio.Task]:
+        """
+        Start tool calls without waiting for them
         
         Args:
             tool_calls: List of tool calls from LLM
             session_context: Current session context
         
         Returns:
-            List of tool results
+            One task per tool call, in the same order as tool_calls
         """
-        results = []
+        tasks: Dict[str, asyncio.Task] = {}
         
         for tool_call in tool_calls:
-            try:
-                logger.info(f"Executing tool: {tool_call['name']}")
-                
-                # Get tool function
-                tool_func = self.tool_registry.get_tool(tool_call['name'])
-                
-                if not tool_func:
-                    raise ValueError(f"Tool not found: {tool_call['name']}")
-                
-                # Execute tool
-                result = await tool_func(
-                    **tool_call['input'],
-                    context=session_context
-                )
-                
-                results.append({
-                    "tool_call_id": tool_call['id'],
-                    "name": tool_call['name'],
-                    "content": json.dumps(result)
-                })
-                
-            except Exception as e:
-                logger.error(f"Error executing tool {tool_call['name']}: {e}", exc_info=True)
-                results.append({
-                    "tool_call_id": tool_call['id'],
-                    "name": tool_call['name'],
-                    "content": json.dumps({"error": str(e)})
-                })
+            # Only earlier calls can be prerequisites, so there are no cycles
+            prerequisites = [
+                tasks[dep_id] for dep_id in tool_call.get("depends_on", ()) if dep_id in tasks
+            ]
+            tasks[tool_call['id']] = asyncio.create_task(
+                self._execute_after(tool_call, session_context, prerequisites)
+            )
+        
+        return list(tasks.values())
+    
+    async def _execute_after(
+        self,
+        tool_call: Dict,
+        session_context: Dict,
+        prerequisites: List[asyncio.Task]
+    ) -> Dict:
+        """Wait for prerequisite tool calls, then execute this one"""
+        if prerequisites:
+            await asyncio.wait(prerequisites)
+        return await self.execute_tool_call(tool_call, session_context)
+    
+    async def execute_tool_call(self, tool_call: Dict, session_context: Dict) -> Dict:
+        """
+        Execute a single tool call
         
-        return results
+        Errors are returned as the tool result so the follow-up LLM turn
+        can recover instead of failing the whole request.
+        
+        Args:
+            tool_call: Tool call from LLM
+            session_context: Current session context
+        
+        Returns:
+            Tool result
+        """
+        try:
+            logger.info(f"Executing tool: {tool_call['name']}")
+            
+            # Get tool function
+            tool_func = self.tool_registry.get_tool(tool_call['name'])
+            
+            if not tool_func:
+                raise ValueError(f"Tool not found: {tool_call['name']}")
+            
+            # Execute tool (a timeout is reported like any other tool error)
+            result = await asyncio.wait_for(
+                tool_func(**tool_call['input'], context=session_context),
+                timeout=_TOOL_TIMEOUT_SECONDS
+            )
+            
+            return {
+                "tool_call_id": tool_call['id'],
+                "name": tool_call['name'],
+                "content": orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS).decode()
+            }
+            
+        except asyncio.TimeoutError:
+            logger.error(f"Tool {tool_call['name']} timed out after {_TOOL_TIMEOUT_SECONDS}s")
+            return {
+                "tool_call_id": tool_call['id'],
+                "name": tool_call['name'],
+                "content": _TOOL_TIMEOUT_CONTENT
+            }
+        except Exception as e:
+            logger.error(f"Error executing tool {tool_call['name']}: {e}", exc_info=True)
+            return {
+                "tool_call_id": tool_call['id'],
+                "name": tool_call['name'],
+                "content": orjson.dumps({"error": str(e)}).decode()
+            }
     
     async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings using OpenAI
         
+        Requests from concurrent callers are batched into one API call.
+        
         Args:
             texts: List of texts to embed
         
         Returns:
             List of embedding vectors
         """
+        return await self.embedding_batcher.embed(texts)
+    
+    async def _create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch of texts with a single OpenAI request"""
         try:
             response = await self.openai_client.embeddings.create(
                 model=settings.OPENAI_EMBEDDING_MODEL,
@@ -325,13 +692,26 @@ class LLMService:
             logger.error(f"Error generating embeddings: {e}", exc_info=True)
             raise
     
+    async def close(self):
+        """Stop background tasks and close the shared HTTP connection pool"""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+        await self.embedding_batcher.close()
+        await self.http_client.aclose()
+    
     def get_cost_stats(self) -> Dict[str, Any]:
         """Get cost statistics"""
         return {
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
+            "total_cached_input_tokens": self.total_cached_input_tokens,
             "total_cost": self.total_cost,
             "primary_model": self.primary_model,
             "fallback_model": self.fallback_model,
-            "using_fallback": self.use_fallback
+            "using_fallback": self.use_fallback,
+            "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache else None
         }
+
+
+# Global LLM service instance
+llm_service = LLMService()
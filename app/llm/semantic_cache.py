@@ -0,0 +1,159 @@
+"""
+Semantic Cache
+Serves repeated LLM queries ("I want pizza", "can I get a pizza") from memory
+Matches queries by embedding similarity within an isolated cache scope
+"""
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _ScopeEntries:
+    """Cached queries, unit-normalized embeddings and responses for one scope"""
+    
+    def __init__(self):
+        self.keys: List[str] = []
+        self.vectors: List[np.ndarray] = []
+        self.responses: List[Dict[str, Any]] = []
+        self.exact: Dict[str, Dict[str, Any]] = {}
+        self._matrix: Optional[np.ndarray] = None
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        """Stacked embeddings, rebuilt only after the scope changes"""
+        if self._matrix is None:
+            self._matrix = np.vstack(self.vectors)
+        return self._matrix
+    
+    def add(self, key: str, vector: np.ndarray, response: Dict[str, Any], max_entries: int):
+        self.keys.append(key)
+        self.vectors.append(vector)
+        self.responses.append(response)
+        self.exact[key] = response
+        
+        # Evict oldest entries first
+        if len(self.keys) > max_entries:
+            # A newer duplicate of the evicted query keeps its exact entry
+            if self.exact.get(self.keys[0]) is self.responses[0]:
+                del self.exact[self.keys[0]]
+            del self.keys[0], self.vectors[0], self.responses[0]
+        
+        self._matrix = None
+
+
+class SemanticCache:
+    """
+    In-process semantic cache for LLM responses
+    
+    Entries are isolated per scope (e.g. agent type + order state) so one
+    agent's answer is never served to another. Exact repeats are answered
+    without an embedding call; otherwise the nearest cached query wins if its
+    cosine similarity reaches the threshold.
+    
+    Only tool-free responses are stored: a cached tool call could replay a
+    write (create order, collect feedback) with another caller's arguments.
+    """
+    
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Awaitable[List[List[float]]]],
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+        max_scopes: int = 1000
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        
+        self._scopes: "OrderedDict[str, _ScopeEntries]" = OrderedDict()
+        
+        # Stats
+        self.hits = 0
+        self.misses = 0
+    
+    async def get_or_generate(
+        self,
+        scope: str,
+        query: str,
+        generate: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Return a cached response for query, or generate and cache one
+        
+        Args:
+            scope: Cache partition key
+            query: User query to match
+            generate: Coroutine factory producing the LLM response on a miss
+        
+        Returns:
+            LLM response dict ("cached": True on hits)
+        """
+        key = self._normalize(query)
+        entries = self._scopes.get(scope)
+        
+        # Exact repeat: no embedding needed
+        if entries is not None:
+            response = entries.exact.get(key)
+            if response is not None:
+                return self._hit(scope, response)
+        
+        try:
+            vector = await self._embed(key)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup skipped: {e}")
+            return await generate()
+        
+        if entries is not None:
+            similarities = entries.matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                return self._hit(scope, entries.responses[best])
+        
+        self.misses += 1
+        response = await generate()
+        
+        if not response.get("tool_calls"):
+            self._store(scope, key, vector, response)
+        
+        return response
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "scopes": len(self._scopes)
+        }
+    
+    def _hit(self, scope: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        self.hits += 1
+        self._scopes.move_to_end(scope)
+        return {**response, "cached": True, "latency": 0.0, "cost": 0.0}
+    
+    def _store(self, scope: str, key: str, vector: np.ndarray, response: Dict[str, Any]):
+        entries = self._scopes.get(scope)
+        if entries is None:
+            entries = self._scopes[scope] = _ScopeEntries()
+            if len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        else:
+            self._scopes.move_to_end(scope)
+        
+        entries.add(key, vector, response, self.max_entries)
+    
+    async def _embed(self, text: str) -> np.ndarray:
+        """Embed text as a unit vector so dot product is cosine similarity"""
+        vector = np.asarray((await self.embed([text]))[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
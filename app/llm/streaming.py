@@ -0,0 +1,56 @@
+"""
+Streaming Helpers
+Splits streamed LLM text into sentences that can be spoken as they complete
+"""
+import re
+from typing import List, Optional
+
+# Sentence end: terminal punctuation followed by whitespace, so "2.5" and
+# a trailing "..." still waiting for more text are not split
+_SENTENCE_END = re.compile(r"[.?!]+[\"')]*\s+")
+
+
+class SentenceBuffer:
+    """Accumulates text deltas and releases complete sentences"""
+    
+    def __init__(self):
+        self._buffer = ""
+    
+    def feed(self, text: str) -> List[str]:
+        """
+        Add a text delta
+        
+        Args:
+            text: Next piece of streamed text
+        
+        Returns:
+            Sentences completed by this delta, in order
+        """
+        self._buffer += text
+        
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            sentence = self._buffer[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        
+        self._buffer = self._buffer[start:]
+        return sentences
+    
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream ends"""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split complete text into sentences the same way SentenceBuffer does"""
+    buffer = SentenceBuffer()
+    sentences = buffer.feed(text)
+    rest = buffer.flush()
+    if rest:
+        sentences.append(rest)
+    return sentences
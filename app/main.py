@@ -4,13 +4,20 @@ Main Application Entry Point
 """
 import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, shutdown_logging
+from app.core.runtime import install_uvloop
+from app.llm.llm_service import llm_service
+from app.services.state_manager import state_manager
 from app.api import voice
 from app.api import orders
 
+# Use uvloop for event loops created from here on
+uvloop_enabled = install_uvloop()
+
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -23,6 +30,7 @@ app = FastAPI(
     description="Multi-Agent AI Voice Calling System for Food Delivery Platform",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -55,6 +63,9 @@ async def startup():
 async def shutdown():
     """Shutdown event"""
     logger.info("Shutting down...")
+    await state_manager.close()
+    await llm_service.close()
+    shutdown_logging()
 
 
 @app.get("/health")
@@ -87,4 +98,16 @@ if __name__ == "__main__":
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=settings.DEBUG,
+        # Reload runs a single process. API_WORKERS defaults to 1: order,
+        # support and feedback state and the metrics registry are still
+        # per process, so other workers wouldn't see them
+        workers=1 if settings.DEBUG else settings.API_WORKERS,
+        loop="uvloop" if uvloop_enabled else "asyncio",
+        http="httptools",
+        # Keep the queue-based handlers from setup_logging() in place
+        log_config=None,
+        # Media frames are base64 audio: deflate only burns CPU
+        ws_per_message_deflate=False,
+        ws_ping_interval=30.0,
+        ws_ping_timeout=30.0,
     )
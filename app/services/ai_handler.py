@@ -2,37 +2,43 @@
 AI Order Handler
 Integrates with Orchestrator Agent for intelligent multi-agent routing
 """
-import os
-import json
 import logging
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import TYPE_CHECKING, FrozenSet, NamedTuple, Tuple
+
+import ahocorasick
 from dotenv import load_dotenv
-from openai import OpenAI
-from app.data.menu import MENU, search_menu, get_menu_text
-from app.services.order_service import OrderService
-from app.services.restaurant_service import RestaurantService
-from app.services.driver_service import DriverService
 from app.agents.orchestrator_agent import orchestrator
+from app.services.state_manager import state_manager
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    logger.warning("OpenAI API key not found!")
-    client = None
-else:
-    client = OpenAI(api_key=api_key)
+if TYPE_CHECKING:
+    from app.services.order_service import OrderService
+    from app.services.restaurant_service import RestaurantService
+    from app.services.driver_service import DriverService
+
+
+class _BackendServices(NamedTuple):
+    order: "OrderService"
+    restaurant: "RestaurantService"
+    driver: "DriverService"
 
-# Services for backend integration
-order_service = OrderService()
-restaurant_service = RestaurantService()
-driver_service = DriverService()
 
-# Conversation history storage (in-memory for now)
-conversations = {}
+@lru_cache(maxsize=1)
+def _get_services() -> _BackendServices:
+    """Build the backend services on the first order placed, then share them"""
+    from app.services.order_service import OrderService
+    from app.services.restaurant_service import RestaurantService
+    from app.services.driver_service import DriverService
+    
+    return _BackendServices(OrderService(), RestaurantService(), DriverService())
+
 
 # Order workflow states
 class OrderState:
@@ -46,197 +52,349 @@ class OrderState:
     FEEDBACK = "feedback"
 
 
-def process_order_with_ai(call_sid: str, user_speech: str):
+async def process_order_with_ai(call_sid: str, user_speech: str):
     """Process user speech with AI and return response"""
     
     logger.info(f"=== STARTING AI PROCESSING for {call_sid} ===")
     logger.info(f"User said: {user_speech}")
     
     try:
-        # Initialize conversation history
-        if call_sid not in conversations:
-            conversations[call_sid] = {
-                "messages": [],
-                "order": [],
-                "state": OrderState.MENU,
-                "address": None,
-                "payment_method": None,
-                "order_id": None
-            }
-            logger.info("Created new conversation")
-        
-        conv = conversations[call_sid]
-        
-        # ========== ORCHESTRATOR ROUTING DECISION ==========
-        logger.info("="*70)
-        logger.info("🎯 ORCHESTRATOR AGENT - ANALYZING USER INTENT")
-        logger.info("="*70)
-        
-        routing = orchestrator.route_to_agent(user_speech, conv)
-        
-        logger.info(f"📊 ROUTING DECISION:")
-        logger.info(f"   ├─ Target Agent: {routing['agent'].upper()}")
-        logger.info(f"   ├─ Intent: {routing['intent']}")
-        logger.info(f"   ├─ Confidence: {routing['confidence']}")
-        logger.info(f"   └─ Reason: {routing['reason']}")
-        logger.info("="*70)
-        
-        # Route to appropriate agent handler
-        if routing['agent'] == 'tracking':
-            logger.info("📍 Routing to TRACKING AGENT...")
-            return _handle_tracking_agent(conv, user_speech)
-        elif routing['agent'] == 'support':
-            logger.info("🆘 Routing to SUPPORT AGENT...")
-            return _handle_support_agent(conv, user_speech)
-        elif routing['agent'] == 'feedback':
-            logger.info("⭐ Routing to FEEDBACK AGENT...")
-            return _handle_feedback_agent(conv, user_speech)
-        else:  # Default to order agent
-            logger.info("📦 Routing to ORDER AGENT...")
-            return _handle_order_agent(conv, user_speech)
-        
+        # Conversations live in Redis so any worker can serve the next turn;
+        # the lock keeps overlapping webhooks for one call from racing
+        async with await state_manager.call_lock(call_sid):
+            conv = await state_manager.get_call_conversation(call_sid)
+            
+            # Initialize conversation history
+            if conv is None:
+                conv = {
+                    "messages": [],
+                    "order": [],
+                    "state": OrderState.MENU,
+                    "address": None,
+                    "payment_method": None,
+                    "order_id": None
+                }
+                logger.info("Created new conversation")
+            
+            response = await _route_to_agent(conv, user_speech)
+            
+            await state_manager.save_call_conversation(call_sid, conv)
+            return response
+    
     except Exception as e:
         logger.error(f"Error in AI handler: {e}", exc_info=True)
         return "I'm having trouble processing that. Could you repeat your order?"
 
 
-def _handle_order_agent(conv: dict, user_speech: str) -> str:
-    """Handle order-related requests"""
+async def _route_to_agent(conv: dict, user_speech: str) -> str:
+    """Route one turn to the agent handler picked by the orchestrator"""
+    # Normalized once; every handler matches against this
     user_lower = user_speech.lower().strip()
     
-    logger.info(f"📦 ORDER AGENT handling: state={conv['state']}")
+    # ========== ORCHESTRATOR ROUTING DECISION ==========
+    logger.info("="*70)
+    logger.info("🎯 ORCHESTRATOR AGENT - ANALYZING USER INTENT")
+    logger.info("="*70)
+    
+    routing = orchestrator.route_to_agent(user_speech, conv)
+    
+    logger.info(f"📊 ROUTING DECISION:")
+    logger.info(f"   ├─ Target Agent: {routing['agent'].upper()}")
+    logger.info(f"   ├─ Intent: {routing['intent']}")
+    logger.info(f"   ├─ Confidence: {routing['confidence']}")
+    logger.info(f"   └─ Reason: {routing['reason']}")
+    logger.info("="*70)
+    
+    # Route to appropriate agent handler
+    if routing['agent'] == 'tracking':
+        logger.info("📍 Routing to TRACKING AGENT...")
+        return _handle_tracking_agent(conv, user_speech, user_lower)
+    elif routing['agent'] == 'support':
+        logger.info("🆘 Routing to SUPPORT AGENT...")
+        return _handle_support_agent(conv, user_speech, user_lower)
+    elif routing['agent'] == 'feedback':
+        logger.info("⭐ Routing to FEEDBACK AGENT...")
+        return _handle_feedback_agent(conv, user_speech, user_lower)
+    else:  # Default to order agent
+        logger.info("📦 Routing to ORDER AGENT...")
+        return await _handle_order_agent(conv, user_speech, user_lower)
+
+
+# Short answers to the order agent's questions
+_YES_WORDS = frozenset(["yes", "yeah", "yep", "sure", "okay", "ok"])
+_NO_WORDS = frozenset(["no", "nope", "no thanks", "nah", "no."])
+
+_MENU_LIST = "Margherita Pizza for 299 rupees, Chicken Burger for 199 rupees, French Fries for 99 rupees, Pasta Alfredo for 279 rupees, and Club Sandwich for 179 rupees."
+_MENU_REPLY_YES = f"Here's our menu: {_MENU_LIST} What would you like?"
+_MENU_REPLY = f"Here's our menu: {_MENU_LIST} What would you like to order?"
+
+# (keywords, order entry name, price, spoken label), checked in this order
+_ORDERABLE_ITEMS = (
+    (("pizza",), "Margherita Pizza", 299, "Pizza (299 rupees)"),
+    (("burger",), "Chicken Burger", 199, "Burger (199 rupees)"),
+    (("fries", "french fries"), "French Fries", 99, "Fries (99 rupees)"),
+    (("pasta",), "Pasta Alfredo", 279, "Pasta (279 rupees)"),
+    (("sandwich", "sandwiches"), "Club Sandwich", 179, "Sandwich (179 rupees)"),
+)
+
+# conv["order"] holds indices into these, so a conversation stores one small
+# int per item instead of a name/price dict
+_ITEM_NAMES = tuple(item[1] for item in _ORDERABLE_ITEMS)
+_ITEM_PRICES = tuple(item[2] for item in _ORDERABLE_ITEMS)
+
+
+def _order_total(order: list) -> int:
+    """Total price of an order (list of item indices)"""
+    return sum(_ITEM_PRICES[index] for index in order)
+
+# Order agent keyword groups
+_MENU = "menu"
+_DONE = "done"
+_CASH = "cash"
+_ONLINE = "online"
+_ITEM = "item"
+
+# Support keyword groups
+_ISSUE = "issue"
+_REFUND = "refund"
+
+
+def _build_keyword_automaton(groups: dict) -> ahocorasick.Automaton:
+    """
+    Compile keyword groups into one Aho-Corasick automaton
+    
+    Args:
+        groups: Mapping of (group, value) -> keywords
+    
+    Returns:
+        Automaton whose matches carry their (group, value) payload
+    """
+    automaton = ahocorasick.Automaton()
+    for payload, keywords in groups.items():
+        for keyword in keywords:
+            automaton.add_word(keyword, payload)
+    automaton.make_automaton()
+    return automaton
+
+
+_ORDER_AUTOMATON = _build_keyword_automaton({
+    (_MENU, None): ["menu", "list", "what do you have", "show me", "tell me items"],
+    (_DONE, None): ["that's all", "thats all", "done", "finish", "complete"],
+    (_CASH, None): ["cash", "cod"],
+    (_ONLINE, None): ["online", "card", "upi"],
+    **{(_ITEM, index): item[0] for index, item in enumerate(_ORDERABLE_ITEMS)},
+})
+
+_SUPPORT_AUTOMATON = _build_keyword_automaton({
+    (_ISSUE, None): ["cold", "late", "wrong", "missing"],
+    (_REFUND, None): ["refund", "cancel"],
+})
+
+# Feedback replies depend only on the rating, so each is rendered once here
+_RATING_REPLIES = {
+    rating: (
+        f"Thank you for the {rating}-star rating! Here's 10% off your next order with code SAVE10. Goodbye!"
+        if rating >= 4 else
+        "Thanks for your feedback. Here's 15% off next time. Code: SAVE15. Goodbye!"
+        if rating == 3 else
+        "We're sorry about your experience. Here's 20% off. Code: SAVE20. Support will call you. Goodbye!"
+    )
+    for rating in range(1, 6)
+}
+_ASK_RATING_REPLY = "Please rate us from 1 to 5 stars."
+
+# Ratings as whole words, so "someone" or "10 minutes" don't count as one
+_RATING_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5}
+_RATING_RE = re.compile(r"\b(?:([1-5])|(one|two|three|four|five))\b")
+
+
+def _scan_keywords(automaton: ahocorasick.Automaton, user_lower: str) -> FrozenSet[Tuple[str, object]]:
+    """Return every (group, value) whose keywords occur in user speech, in one pass"""
+    return frozenset(payload for _, payload in automaton.iter(user_lower))
+
+
+# Order agent actions; everything but _REPLY changes the conversation
+_REPLY = "reply"
+_FINISH_ITEMS = "finish_items"
+_TAKE_ADDRESS = "take_address"
+_PAY_CASH = "pay_cash"
+_PAY_ONLINE = "pay_online"
+_ADD_ITEMS = "add_items"
+
+
+@lru_cache(maxsize=2048)
+def _classify_order_utterance(state: str, user_lower: str) -> tuple:
+    """
+    Decide what the order agent does with an utterance
+    
+    Depends only on the conversation state and the normalized speech, so
+    repeated phrases ("yes", "that's all", "one pizza") skip the keyword
+    scans entirely.
     
+    Args:
+        state: Conversation state
+        user_lower: Lowercased, stripped user speech
+    
+    Returns:
+        Tuple of (action, *action arguments)
+    """
     # Check for "yes" response first (menu request)
-    if user_lower in ["yes", "yeah", "yep", "sure", "okay", "ok"]:
-        return "Here's our menu: Margherita Pizza for 299 rupees, Chicken Burger for 199 rupees, French Fries for 99 rupees, Pasta Alfredo for 279 rupees, and Club Sandwich for 179 rupees. What would you like?"
+    if user_lower in _YES_WORDS:
+        return (_REPLY, _MENU_REPLY_YES)
     
     # Check for "no" response - end conversation gracefully
-    if user_lower in ["no", "nope", "no thanks", "nah", "no."]:
-        if conv["state"] in [OrderState.MENU, OrderState.ORDERING]:
-            return "Would you like me to list our menu? Say yes to hear the items."
-        else:
-            # After order confirmed, "no" means end call
-            return "Thank you for ordering with us! Goodbye!"
+    if user_lower in _NO_WORDS:
+        if state in (OrderState.MENU, OrderState.ORDERING):
+            return (_REPLY, "Would you like me to list our menu? Say yes to hear the items.")
+        # After order confirmed, "no" means end call
+        return (_REPLY, "Thank you for ordering with us! Goodbye!")
+    
+    matches = _scan_keywords(_ORDER_AUTOMATON, user_lower)
     
     # Check for menu request
-    if any(word in user_lower for word in ["menu", "list", "what do you have", "show me", "tell me items"]):
-        return "Here's our menu: Margherita Pizza for 299 rupees, Chicken Burger for 199 rupees, French Fries for 99 rupees, Pasta Alfredo for 279 rupees, and Club Sandwich for 179 rupees. What would you like to order?"
+    if (_MENU, None) in matches:
+        return (_REPLY, _MENU_REPLY)
     
     # Check for order completion - move to address collection
-    if any(word in user_lower for word in ["that's all", "thats all", "done", "finish", "complete"]):
-        if conv["order"]:
-            conv["state"] = OrderState.ADDRESS
-            total = sum(item['price'] for item in conv["order"])
-            item_count = len(conv["order"])
-            return f"Perfect! {item_count} items, total {total} rupees. Please tell me your delivery address."
-        else:
-            return "You haven't ordered anything yet. Would you like me to list the menu?"
+    if (_DONE, None) in matches:
+        return (_FINISH_ITEMS,)
     
     # Handle address collection
-    if conv["state"] == OrderState.ADDRESS:
-        if len(user_speech.split()) >= 3:  # Basic validation
-            conv["address"] = user_speech
-            conv["state"] = OrderState.PAYMENT
-            return "Perfect! I've noted your address. For payment, say 'cash on delivery' or 'online payment'."
-        else:
-            return "Please provide a complete address with street, area, and city."
+    if state == OrderState.ADDRESS:
+        if len(user_lower.split()) >= 3:  # Basic validation
+            return (_TAKE_ADDRESS,)
+        return (_REPLY, "Please provide a complete address with street, area, and city.")
     
-    # Handle payment selection - CREATE ORDER WITH BACKEND SERVICES
-    if conv["state"] == OrderState.PAYMENT:
-        if "cash" in user_lower or "cod" in user_lower:
-            conv["payment_method"] = "Cash on Delivery"
-            conv["state"] = OrderState.CONFIRMED
-            
-            # ========== BACKEND INTEGRATION: CREATE ORDER ==========
-            try:
-                # Create order via Order Service
-                order = order_service.create_order(
-                    customer_phone="+919490362478",  # From call
-                    items=conv["order"],
-                    address=conv["address"],
-                    payment_method="Cash on Delivery"
-                )
-                order_id = order["order_id"]
-                conv["order_id"] = order_id
-                
-                # Notify Restaurant Agent
-                restaurant_result = restaurant_service.notify_restaurant(order_id, order)
-                prep_time = restaurant_result.get("prep_time_minutes", 20)
-                
-                # Assign Driver Agent
-                driver_result = driver_service.assign_driver(
-                    order_id=order_id,
-                    driver_id="drv_001",
-                    restaurant_location={"lat": 28.7041, "lng": 77.1025},
-                    customer_location={"address": conv["address"]}
-                )
-                delivery_eta = driver_result.get("delivery_eta_minutes", 35)
-                
-                logger.info(f"✅ Order {order_id} created → Restaurant notified → Driver assigned")
-                
-                total = sum(item['price'] for item in conv["order"])
-                
-                # Offer tracking/support option
-                conv["state"] = OrderState.TRACKING
-                return f"Perfect! Order {order_id} confirmed for {total} rupees. Delivery in {delivery_eta} minutes. Say 'track order' for updates or 'support' for help. Thank you!"
-                
-            except Exception as e:
-                logger.error(f"Error creating order: {e}")
-                total = sum(item['price'] for item in conv["order"])
-                return f"Perfect! Order confirmed for {total} rupees. Delivery in 30-45 minutes. Thank you!"
-            
-        elif "online" in user_lower or "card" in user_lower or "upi" in user_lower:
-            conv["payment_method"] = "Online Payment"
-            conv["state"] = OrderState.CONFIRMED
-            total = sum(item['price'] for item in conv["order"])
-            return f"Perfect! Order confirmed for {total} rupees. Payment link sent. Expected delivery in 30 to 45 minutes. Thank you!"
-        else:
-            return "Please say cash on delivery or online payment."
+    # Handle payment selection
+    if state == OrderState.PAYMENT:
+        if (_CASH, None) in matches:
+            return (_PAY_CASH,)
+        if (_ONLINE, None) in matches:
+            return (_PAY_ONLINE,)
+        return (_REPLY, "Please say cash on delivery or online payment.")
     
     # Add items to order (only in MENU or ORDERING state)
-    if conv["state"] in [OrderState.MENU, OrderState.ORDERING]:
-        conv["state"] = OrderState.ORDERING
-        
-        # Detect multiple items in one sentence
-        items_added = []
-        
-        if "pizza" in user_lower:
-            conv["order"].append({"name": "Margherita Pizza", "price": 299})
-            items_added.append("Pizza (299 rupees)")
+    if state in (OrderState.MENU, OrderState.ORDERING):
+        # Detect multiple items in one sentence, listed in menu order
+        matched = tuple(sorted(value for group, value in matches if group == _ITEM))
+        if matched:
+            items_str = ", ".join(_ORDERABLE_ITEMS[index][3] for index in matched)
+            reply = f"Added {items_str}. Anything else? Say 'done' when finished."
+        else:
+            reply = "I can help you order Pizza, Burger, French Fries, Pasta, or Sandwich. Would you like me to list the full menu with prices?"
+        return (_ADD_ITEMS, matched, reply)
+    
+    return (_REPLY, "I didn't quite catch that. Could you please repeat?")
+
+
+async def _handle_order_agent(conv: dict, user_speech: str, user_lower: str) -> str:
+    """Handle order-related requests"""
+    logger.info(f"📦 ORDER AGENT handling: state={conv['state']}")
+    
+    action, *args = _classify_order_utterance(conv["state"], user_lower)
+    if action == _REPLY:
+        return args[0]
+    
+    return await _ORDER_ACTIONS[action](conv, user_speech, *args)
+
+
+async def _finish_items(conv: dict, user_speech: str) -> str:
+    """Move to address collection once something has been ordered"""
+    if not conv["order"]:
+        return "You haven't ordered anything yet. Would you like me to list the menu?"
+    
+    conv["state"] = OrderState.ADDRESS
+    total = _order_total(conv["order"])
+    item_count = len(conv["order"])
+    return f"Perfect! {item_count} items, total {total} rupees. Please tell me your delivery address."
+
+
+async def _take_address(conv: dict, user_speech: str) -> str:
+    """Store the delivery address and ask for payment"""
+    conv["address"] = user_speech
+    conv["state"] = OrderState.PAYMENT
+    return "Perfect! I've noted your address. For payment, say 'cash on delivery' or 'online payment'."
+
+
+async def _pay_cash(conv: dict, user_speech: str) -> str:
+    """Cash on delivery: create the order with the backend services"""
+    conv["payment_method"] = "Cash on Delivery"
+    conv["state"] = OrderState.CONFIRMED
+    
+    # ========== BACKEND INTEGRATION: CREATE ORDER ==========
+    try:
+        services = _get_services()
         
-        if "burger" in user_lower:
-            conv["order"].append({"name": "Chicken Burger", "price": 199})
-            items_added.append("Burger (199 rupees)")
+        # Create order via Order Service
+        order = services.order.create_order(
+            customer_phone="+919490362478",  # From call
+            items=[
+                {"name": _ITEM_NAMES[index], "price": _ITEM_PRICES[index]}
+                for index in conv["order"]
+            ],
+            address=conv["address"],
+            payment_method="Cash on Delivery"
+        )
+        order_id = order["order_id"]
+        conv["order_id"] = order_id
         
-        if "fries" in user_lower or "french fries" in user_lower:
-            conv["order"].append({"name": "French Fries", "price": 99})
-            items_added.append("Fries (99 rupees)")
+        # Notify Restaurant Agent and assign Driver Agent (in-memory, so called
+        # inline; the driver check-and-claim must not leave the event loop)
+        restaurant_result = services.restaurant.notify_restaurant(order_id, order)
+        driver_result = services.driver.assign_driver(
+            order_id=order_id,
+            driver_id="drv_001",
+            restaurant_location={"lat": 28.7041, "lng": 77.1025},
+            customer_location={"address": conv["address"]}
+        )
+        prep_time = restaurant_result.get("prep_time_minutes", 20)
+        delivery_eta = driver_result.get("delivery_eta_minutes", 35)
         
-        if "pasta" in user_lower:
-            conv["order"].append({"name": "Pasta Alfredo", "price": 279})
-            items_added.append("Pasta (279 rupees)")
+        logger.info(f"✅ Order {order_id} created → Restaurant notified → Driver assigned")
         
-        if "sandwich" in user_lower or "sandwiches" in user_lower:
-            conv["order"].append({"name": "Club Sandwich", "price": 179})
-            items_added.append("Sandwich (179 rupees)")
+        total = _order_total(conv["order"])
         
-        if items_added:
-            items_str = ", ".join(items_added)
-            return f"Added {items_str}. Anything else? Say 'done' when finished."
-        else:
-            return "I can help you order Pizza, Burger, French Fries, Pasta, or Sandwich. Would you like me to list the full menu with prices?"
+        # Offer tracking/support option
+        conv["state"] = OrderState.TRACKING
+        return f"Perfect! Order {order_id} confirmed for {total} rupees. Delivery in {delivery_eta} minutes. Say 'track order' for updates or 'support' for help. Thank you!"
     
-    return "I didn't quite catch that. Could you please repeat?"
+    except Exception as e:
+        logger.error(f"Error creating order: {e}")
+        total = _order_total(conv["order"])
+        return f"Perfect! Order confirmed for {total} rupees. Delivery in 30-45 minutes. Thank you!"
+
+
+async def _pay_online(conv: dict, user_speech: str) -> str:
+    """Online payment: confirm and send a payment link"""
+    conv["payment_method"] = "Online Payment"
+    conv["state"] = OrderState.CONFIRMED
+    total = _order_total(conv["order"])
+    return f"Perfect! Order confirmed for {total} rupees. Payment link sent. Expected delivery in 30 to 45 minutes. Thank you!"
+
+
+async def _add_items(conv: dict, user_speech: str, matched: tuple, reply: str) -> str:
+    """Append the recognized items (as item indices) to the order"""
+    conv["state"] = OrderState.ORDERING
+    conv["order"].extend(matched)
+    return reply
+
 
+# Order agent action -> handler that applies it to the conversation
+_ORDER_ACTIONS = {
+    _FINISH_ITEMS: _finish_items,
+    _TAKE_ADDRESS: _take_address,
+    _PAY_CASH: _pay_cash,
+    _PAY_ONLINE: _pay_online,
+    _ADD_ITEMS: _add_items,
+}
 
-def _handle_tracking_agent(conv: dict, user_speech: str) -> str:
+
+def _handle_tracking_agent(conv: dict, user_speech: str, user_lower: str) -> str:
     """Handle tracking-related requests"""
-    user_lower = user_speech.lower().strip()
-    
     logger.info(f"📍 TRACKING AGENT handling request")
     
     # Check for "no" - customer doesn't want tracking/help
-    if user_lower in ["no", "nope", "no thanks", "nah", "no."]:
+    if user_lower in _NO_WORDS:
         return "Thank you for ordering with us! Goodbye!"
     
     conv["state"] = OrderState.TRACKING
@@ -248,20 +406,20 @@ def _handle_tracking_agent(conv: dict, user_speech: str) -> str:
     return f"Your order {order_id} is on the way! Driver will arrive in approximately 30 minutes. Say 'support' if you need help or 'rate' to give feedback."
 
 
-def _handle_support_agent(conv: dict, user_speech: str) -> str:
+def _handle_support_agent(conv: dict, user_speech: str, user_lower: str) -> str:
     """Handle support/complaint requests"""
-    user_lower = user_speech.lower().strip()
-    
     logger.info(f"🆘 SUPPORT AGENT handling complaint/issue")
     
     conv["state"] = OrderState.SUPPORT
     
+    matches = _scan_keywords(_SUPPORT_AUTOMATON, user_lower)
+    
     # Detect specific issues
-    if any(word in user_lower for word in ["cold", "late", "wrong", "missing"]):
+    if (_ISSUE, None) in matches:
         conv["state"] = OrderState.FEEDBACK  # Move to feedback after resolving
         return "I apologize for that. I'm processing a 50% refund immediately. Would you like to rate your experience?"
     
-    if "refund" in user_lower or "cancel" in user_lower:
+    if (_REFUND, None) in matches:
         conv["state"] = OrderState.FEEDBACK
         return "Your refund is being processed. You'll receive it in 5-7 days. Would you like to provide feedback?"
     
@@ -269,45 +427,33 @@ def _handle_support_agent(conv: dict, user_speech: str) -> str:
     return "I'm connecting you to customer support. What can I help you with? You can report issues, request refunds, or cancel your order."
 
 
-def _handle_feedback_agent(conv: dict, user_speech: str) -> str:
+def _handle_feedback_agent(conv: dict, user_speech: str, user_lower: str) -> str:
     """Handle feedback/rating requests"""
-    user_lower = user_speech.lower().strip()
-    
     logger.info(f"⭐ FEEDBACK AGENT collecting rating")
     
     conv["state"] = OrderState.FEEDBACK
     
-    # Check for rating (numbers or words)
-    rating = None
-    rating_words = ["one", "two", "three", "four", "five"]
-    
-    for i in range(1, 6):
-        if str(i) in user_lower or rating_words[i-1] in user_lower:
-            rating = i
-            break
-    
-    if rating:
-        if rating >= 4:
-            return f"Thank you for the {rating}-star rating! Here's 10% off your next order with code SAVE10. Goodbye!"
-        elif rating == 3:
-            return f"Thanks for your feedback. Here's 15% off next time. Code: SAVE15. Goodbye!"
-        else:
-            return f"We're sorry about your experience. Here's 20% off. Code: SAVE20. Support will call you. Goodbye!"
+    # Check for rating (numbers or words); the lowest mentioned wins
+    rating = min(
+        (int(digit) if digit else _RATING_WORDS[word] for digit, word in _RATING_RE.findall(user_lower)),
+        default=None
+    )
     
-    return "Please rate us from 1 to 5 stars."
+    return _RATING_REPLIES.get(rating, _ASK_RATING_REPLY)
 
 
-def get_order_summary(call_sid: str):
+async def get_order_summary(call_sid: str):
     """Get order summary for confirmation"""
-    if call_sid not in conversations or not conversations[call_sid]["order"]:
+    conv = await state_manager.get_call_conversation(call_sid)
+    if not conv or not conv["order"]:
         return "No items in order yet."
     
-    order = conversations[call_sid]["order"]
-    total = sum(item['price'] * item['quantity'] for item in order)
+    order = conv["order"]
+    total = _order_total(order)
     
     summary = "Your order: "
-    for item in order:
-        summary += f"{item['quantity']} {item['name']}, "
+    for index, quantity in sorted(Counter(order).items()):
+        summary += f"{quantity} {_ITEM_NAMES[index]}, "
     summary += f"Total: ₹{total}"
     
     return summary
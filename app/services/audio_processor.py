@@ -4,20 +4,94 @@ Handles real-time audio streaming, STT, TTS, and interruption detection
 """
 import asyncio
 import logging
-import base64
-import json
-from typing import Optional
+import os
+import re
+import binascii
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
+from time import perf_counter
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Union
+from urllib.parse import urlencode
 from deepgram import Deepgram
-from elevenlabs import generate, stream, set_api_key
 import websockets
 
 from app.core.config import settings
-from app.services.state_manager import StateManager
+from app.services.state_manager import state_manager
+from app.services.mulaw import SAMPLE_RATE, ulaw_to_pcm16
 from app.agents.orchestrator import AgentOrchestrator
 
 logger = logging.getLogger(__name__)
 
-set_api_key(settings.ELEVENLABS_API_KEY)
+def _decode_frames(payloads: List[str]) -> bytes:
+    """
+    Base64-decode consecutive media frames into one buffer
+    
+    Unpadded frames end on a 4-character boundary, so they can be joined
+    and decoded in one call. Padded frames (Twilio's 160-byte frames end in
+    "=") are decoded one by one, since decoding stops at the first pad.
+    
+    Args:
+        payloads: Base64 encoded frames, in order
+    
+    Returns:
+        Raw audio bytes
+    """
+    if not any(payload.endswith("=") or len(payload) % 4 for payload in payloads[:-1]):
+        return binascii.a2b_base64("".join(payloads))
+    return b"".join(map(binascii.a2b_base64, payloads))
+
+
+def _decode_audio(payloads: List[str]) -> bytes:
+    """Decode base64 mu-law frames to PCM16"""
+    return ulaw_to_pcm16(_decode_frames(payloads))
+
+
+# Decodes batches of AUDIO_DECODE_OFFLOAD_FRAMES or more so they don't hold
+# up the event loop; regular 80ms batches take a few microseconds and stay
+# inline, where a thread hop would cost more than the decode
+_AUDIO_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="audio-decode")
+
+# Outbound TTS frames (mu-law, one byte per sample): the first frame is 20ms
+# so the caller hears audio as soon as possible, then frames double up to
+# 200ms. A 10ms tail is held back so a frame never ends on a sliver that the
+# next chunk would have filled.
+_FIRST_FRAME_BYTES = SAMPLE_RATE * 20 // 1000
+_MAX_FRAME_BYTES = SAMPLE_RATE * 200 // 1000
+_TAIL_BYTES = SAMPLE_RATE * 10 // 1000
+
+# ElevenLabs streaming TTS: text goes up the socket, mu-law audio at Twilio's
+# rate comes back, so frames need no transcoding
+_ELEVENLABS_WS_URL = "wss://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream-input"
+
+
+async def _elevenlabs_audio(ws) -> AsyncIterator[bytes]:
+    """
+    Read audio from an ElevenLabs streaming TTS socket
+    
+    Args:
+        ws: Open stream-input WebSocket
+    
+    Yields:
+        mu-law 8kHz audio chunks as they are generated
+    """
+    async for message in ws:
+        data = orjson.loads(message)
+        if data.get("audio"):
+            yield binascii.a2b_base64(data["audio"])
+        if data.get("isFinal"):
+            break
+
+
+# Short replies containing one of these go to the cheaper TTS voice
+_CONFIRMATION_RE = re.compile(
+    r"\b(?:okay|got it|understood|yes|no|sure|alright|thank you)\b",
+    re.IGNORECASE
+)
+
+# Outbound media message around the base64 payload, which needs no escaping
+_MEDIA_PREFIX = '{"event":"media","media":{"payload":"'
+_MEDIA_SUFFIX = '"}}'
 
 
 class AudioProcessor:
@@ -33,15 +107,12 @@ class AudioProcessor:
         
         # Initialize services
         self.deepgram = Deepgram(settings.DEEPGRAM_API_KEY)
-        self.state_manager = StateManager()
+        self.state_manager = state_manager
         self.orchestrator = AgentOrchestrator(session_id)
         
-        # Audio buffers
-        self.inbound_audio_buffer = bytearray()
-        self.silence_duration = 0
-        
         # State
         self.is_speaking = False
+        self.interrupted = False
         self.current_tts_task = None
         self.deepgram_connection = None
         
@@ -54,7 +125,7 @@ class AudioProcessor:
     
     async def start(self):
         """Initialize audio processing"""
-        self.start_time = asyncio.get_event_loop().time()
+        self.start_time = perf_counter()
         logger.info(f"Starting audio processor for call: {self.call_sid}")
         
         # Initialize Deepgram streaming STT
@@ -69,9 +140,22 @@ class AudioProcessor:
         Args:
             audio_payload: Base64 encoded mulaw audio
         """
+        await self.process_inbound_audio_batch([audio_payload])
+    
+    async def process_inbound_audio_batch(self, audio_payloads: List[str]):
+        """
+        Process several consecutive incoming audio frames at once
+        Args:
+            audio_payloads: Base64 encoded mulaw audio frames, in order
+        """
         try:
-            # Decode audio
-            audio_data = base64.b64decode(audio_payload)
+            # Decode audio (Twilio mu-law -> PCM16)
+            if len(audio_payloads) >= settings.AUDIO_DECODE_OFFLOAD_FRAMES:
+                audio_data = await asyncio.get_running_loop().run_in_executor(
+                    _AUDIO_EXECUTOR, _decode_audio, audio_payloads
+                )
+            else:
+                audio_data = _decode_audio(audio_payloads)
             
             # Check for interruption
             if self.is_speaking:
@@ -81,9 +165,6 @@ class AudioProcessor:
             if self.deepgram_connection:
                 await self.deepgram_connection.send(audio_data)
             
-            # Buffer for silence detection
-            self.inbound_audio_buffer.extend(audio_data)
-            
         except Exception as e:
             logger.error(f"Error processing inbound audio: {e}", exc_info=True)
     
@@ -92,6 +173,9 @@ class AudioProcessor:
         try:
             self.deepgram_connection = await self.deepgram.transcription.live({
                 'model': settings.DEEPGRAM_MODEL,
+                'encoding': 'linear16',
+                'sample_rate': SAMPLE_RATE,
+                'channels': 1,
                 'language': settings.DEEPGRAM_LANGUAGE,
                 'punctuate': True,
                 'interim_results': settings.DEEPGRAM_INTERIM_RESULTS,
@@ -147,40 +231,62 @@ class AudioProcessor:
     async def _process_user_input(self, text: str):
         """
         Process user input with agent orchestrator
+        Speaks each sentence of the reply as soon as the LLM finishes it
         """
+        spoken = []
         try:
-            # Get agent response
-            response = await self.orchestrator.process_input(text)
+            self.interrupted = False
+            response = None
             
-            # Generate and stream TTS
-            await self._speak(response['message'])
+            # Get agent response; the whole reply shares one TTS stream,
+            # opened while the LLM is still working on the first sentence
+            async with self._elevenlabs_reply() as say:
+                async for event in self.orchestrator.stream_input(text):
+                    if event["type"] == "response":
+                        response = event["response"]
+                        continue
+                    
+                    # Barge-in drops the rest of the reply
+                    if self.interrupted:
+                        break
+                    logger.info(f"AI speaking: {event['text']}")
+                    spoken.append(event["text"])
+                    await say(event["text"])
             
             # Check for agent transfer
-            if response.get('transfer_to'):
+            if response and response.get('transfer_to'):
                 await self.orchestrator.transfer_agent(response['transfer_to'])
             
         except Exception as e:
             logger.error(f"Error processing user input: {e}", exc_info=True)
             await self._speak("I'm sorry, I didn't catch that. Could you please repeat?")
+        
+        finally:
+            # Save what the caller actually heard as one turn
+            if spoken:
+                await self.state_manager.add_message(
+                    self.session_id,
+                    role="assistant",
+                    content=" ".join(spoken)
+                )
     
-    async def _speak(self, text: str):
+    async def _speak(self, text: str, record: bool = True):
         """
         Generate speech and stream to caller
         Args:
             text: Text to convert to speech
+            record: Save the text to the conversation as an assistant turn
         """
         try:
-            self.is_speaking = True
-            tts_start = asyncio.get_event_loop().time()
-            
             logger.info(f"AI speaking: {text}")
             
             # Save to state
-            await self.state_manager.add_message(
-                self.session_id,
-                role="assistant",
-                content=text
-            )
+            if record:
+                await self.state_manager.add_message(
+                    self.session_id,
+                    role="assistant",
+                    content=text
+                )
             
             # Use cost-optimized TTS for simple confirmations
             if self._is_simple_confirmation(text) and settings.USE_CHEAPER_TTS_FOR_CONFIRMATIONS:
@@ -188,49 +294,101 @@ class AudioProcessor:
             else:
                 await self._speak_elevenlabs(text)
             
-            # Track TTS latency
-            tts_latency = asyncio.get_event_loop().time() - tts_start
-            self.tts_requests += 1
-            self.total_tts_latency += tts_latency
-            
-            logger.info(f"TTS latency: {tts_latency:.3f}s")
-            
-            self.is_speaking = False
-            
         except Exception as e:
             logger.error(f"Error in TTS: {e}", exc_info=True)
             self.is_speaking = False
     
     async def _speak_elevenlabs(self, text: str):
-        """Stream audio using ElevenLabs"""
+        """Speak one utterance using ElevenLabs"""
         try:
-            # Generate streaming audio
-            audio_stream = generate(
-                text=text,
-                voice=settings.ELEVENLABS_VOICE_ID,
-                model=settings.ELEVENLABS_MODEL,
-                stream=True
-            )
+            async with self._elevenlabs_reply() as say:
+                await say(text)
+        
+        except Exception as e:
+            logger.error(f"ElevenLabs TTS error: {e}", exc_info=True)
+    
+    @asynccontextmanager
+    async def _elevenlabs_reply(self) -> AsyncIterator[Callable[[str], Awaitable[None]]]:
+        """
+        Open one ElevenLabs streaming TTS session for a reply
+        
+        Yields a function that sends the next piece of text; its audio is
+        played to the caller as it arrives. Leaving the block closes the
+        input and waits for the rest of the audio, unless the caller barged
+        in, in which case playback is dropped.
+        """
+        url = _ELEVENLABS_WS_URL.format(voice_id=settings.ELEVENLABS_VOICE_ID) + "?" + urlencode({
+            "model_id": settings.ELEVENLABS_MODEL,
+            "output_format": "ulaw_8000",
+            "optimize_streaming_latency": settings.ELEVENLABS_STREAMING_LATENCY
+        })
+        
+        async with websockets.connect(url) as ws:
+            await ws.send(orjson.dumps({"text": " ", "xi_api_key": settings.ELEVENLABS_API_KEY}).decode())
+            playback = asyncio.create_task(self._play_audio(_elevenlabs_audio(ws)))
+            tts_start = None
             
-            # Stream to Twilio
-            for chunk in audio_stream:
-                if not self.is_speaking:  # Interrupted
-                    break
+            async def say(text: str):
+                nonlocal tts_start
+                if tts_start is None:
+                    tts_start = perf_counter()
+                self.is_speaking = True
+                await ws.send(orjson.dumps({"text": f"{text} ", "flush": True}).decode())
+            
+            try:
+                yield say
+                
+                if self.is_speaking:
+                    # End of input; ElevenLabs finishes the audio and closes
+                    await ws.send('{"text":""}')
+                    await playback
+            finally:
+                playback.cancel()
+                self.is_speaking = False
                 
-                # Encode for Twilio (mulaw)
-                encoded_chunk = base64.b64encode(chunk).decode('utf-8')
+                # Track TTS latency (first text sent to last audio frame)
+                if tts_start is not None:
+                    tts_latency = perf_counter() - tts_start
+                    self.tts_requests += 1
+                    self.total_tts_latency += tts_latency
+                    logger.info(f"TTS latency: {tts_latency:.3f}s")
+    
+    async def _play_audio(self, audio_stream: AsyncIterator[bytes]):
+        """Stream audio chunks to Twilio in progressively larger frames"""
+        try:
+            async with aclosing(audio_stream):
+                pending = bytearray()
+                frame_bytes = _FIRST_FRAME_BYTES
                 
-                # Send via WebSocket
-                await self.websocket.send_text(json.dumps({
-                    "event": "media",
-                    "media": {
-                        "payload": encoded_chunk
-                    }
-                }))
+                async for chunk in audio_stream:
+                    if not self.is_speaking:  # Interrupted
+                        return
+                    
+                    pending += chunk
+                    
+                    # Frames are encoded straight from views of the buffer, which
+                    # is compacted once per chunk rather than once per frame
+                    sent = 0
+                    with memoryview(pending) as view:
+                        while len(view) - sent - _TAIL_BYTES >= frame_bytes:
+                            await self._send_media(view[sent:sent + frame_bytes])
+                            sent += frame_bytes
+                            frame_bytes = min(frame_bytes * 2, _MAX_FRAME_BYTES)
+                    del pending[:sent]
                 
+                if pending and self.is_speaking:
+                    await self._send_media(pending)
+        
         except Exception as e:
             logger.error(f"ElevenLabs TTS error: {e}", exc_info=True)
     
+    async def _send_media(self, audio: Union[bytes, bytearray, memoryview]):
+        """Send one frame of mu-law audio to Twilio"""
+        # Twilio only accepts text frames, so the JSON is assembled around
+        # the payload rather than encoded per frame
+        encoded_chunk = binascii.b2a_base64(audio, newline=False).decode("ascii")
+        await self.websocket.send_text(f"{_MEDIA_PREFIX}{encoded_chunk}{_MEDIA_SUFFIX}")
+    
     async def _speak_deepgram(self, text: str):
         """Stream audio using Deepgram Aura (cheaper alternative)"""
         try:
@@ -250,16 +408,17 @@ class AudioProcessor:
         logger.info("User interruption detected - stopping speech")
         
         self.is_speaking = False
+        self.interrupted = True
         
         # Cancel current TTS task
         if self.current_tts_task:
             self.current_tts_task.cancel()
         
         # Send mark clear to Twilio to stop audio
-        await self.websocket.send_text(json.dumps({
+        await self.websocket.send_text(orjson.dumps({
             "event": "clear",
             "streamSid": self.call_sid
-        }))
+        }).decode())
     
     async def _send_greeting(self):
         """Send initial greeting"""
@@ -269,12 +428,7 @@ class AudioProcessor:
     
     def _is_simple_confirmation(self, text: str) -> bool:
         """Check if text is a simple confirmation"""
-        simple_phrases = [
-            "okay", "got it", "understood", "yes", "no",
-            "sure", "alright", "thank you"
-        ]
-        text_lower = text.lower()
-        return any(phrase in text_lower for phrase in simple_phrases) and len(text) < 20
+        return len(text) < 20 and _CONFIRMATION_RE.search(text) is not None
     
     async def stop(self):
         """Stop audio processing"""
@@ -290,9 +444,6 @@ class AudioProcessor:
     async def cleanup(self):
         """Cleanup resources"""
         await self.stop()
-        
-        # Clear buffers
-        self.inbound_audio_buffer.clear()
     
     async def _save_metrics(self):
         """Save performance metrics"""
@@ -301,7 +452,7 @@ class AudioProcessor:
             'tts_requests': self.tts_requests,
             'avg_stt_latency': self.total_stt_latency / self.stt_requests if self.stt_requests > 0 else 0,
             'avg_tts_latency': self.total_tts_latency / self.tts_requests if self.tts_requests > 0 else 0,
-            'total_duration': asyncio.get_event_loop().time() - self.start_time
+            'total_duration': perf_counter() - self.start_time
         }
         
         await self.state_manager.save_metrics(self.session_id, metrics)
@@ -2,28 +2,103 @@
 Call Service
 Manages call sessions and Twilio integration
 """
+import asyncio
 import logging
+import uuid
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Union
+from zoneinfo import ZoneInfo
+from cachetools import TTLCache
 from twilio.rest import Client
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy import Integer, bindparam, case, select, update
 
-from app.db.models import CallSession, Customer, AgentType, CallDirection
+from app.db.models import (
+    CallSession, Customer, AgentType, CallDirection,
+    AGENT_TYPE_BY_VALUE, CALL_DIRECTION_BY_VALUE
+)
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Calling hours are checked in this zone (TRAI: IST)
+_TRAI_TZ = ZoneInfo(settings.TRAI_TIMEZONE)
+
+# Twilio statuses after which the call is over
+_ENDED_STATUSES = frozenset({"completed", "failed", "busy", "no-answer"})
+
+
+# Phone number -> customer id for known customers. Misses are not cached,
+# so a newly added customer is linked on their next call; the DND flag is
+# never cached and is read fresh before every outbound call
+_CUSTOMER_IDS: "TTLCache[str, uuid.UUID]" = TTLCache(
+    maxsize=10_000,
+    ttl=settings.CUSTOMER_CACHE_TTL_SECONDS
+)
+
+
+@lru_cache(maxsize=1)
+def _get_twilio_client() -> Client:
+    """Twilio REST client shared by every CallService"""
+    return Client(
+        settings.TWILIO_ACCOUNT_SID,
+        settings.TWILIO_AUTH_TOKEN
+    )
+
+
+def _build_status_update(ended: bool, timed: bool):
+    """
+    Build the call_sessions UPDATE for one kind of status callback
+    
+    Args:
+        ended: Set ended_at
+        timed: Set duration and the Twilio cost derived from it
+    
+    Returns:
+        UPDATE statement keyed on the "sid" bind parameter
+    """
+    values = {}
+    if ended:
+        values["ended_at"] = bindparam("ended_at_value")
+    if timed:
+        duration = bindparam("duration_value", type_=Integer)
+        values["duration"] = duration
+        # Per-minute Twilio rate depends on call direction
+        values["cost_twilio"] = duration / 60.0 * case(
+            (CallSession.direction == CallDirection.INBOUND, 0.0085),
+            else_=0.0140
+        )
+    
+    return (
+        update(CallSession)
+        .where(CallSession.call_sid == bindparam("sid"))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
 
 class CallService:
     """Service for managing voice calls"""
     
-    def __init__(self, db: AsyncSession):
+    # One-shot UPDATEs built once, keyed by (ended, timed)
+    _STATUS_UPDATES = {
+        (True, True): _build_status_update(ended=True, timed=True),
+        (True, False): _build_status_update(ended=True, timed=False),
+        (False, True): _build_status_update(ended=False, timed=True),
+    }
+    _RECORDING_UPDATE = (
+        update(CallSession)
+        .where(CallSession.call_sid == bindparam("sid"))
+        .values(recording_url=bindparam("recording_url_value"))
+        .execution_options(synchronize_session=False)
+    )
+    
+    def __init__(self, db: Union[AsyncSession, AsyncConnection]):
+        # Status and recording updates also run on a bare (autocommit)
+        # connection; everything else needs a session
         self.db = db
-        self.twilio_client = Client(
-            settings.TWILIO_ACCOUNT_SID,
-            settings.TWILIO_AUTH_TOKEN
-        )
+        self.twilio_client = _get_twilio_client()
     
     async def create_call_session(
         self,
@@ -36,12 +111,12 @@ class CallService:
         """Create a new call session"""
         
         # Look up customer by phone number
-        customer = await self._get_customer_by_phone(from_number if direction == "inbound" else to_number)
+        customer_id = await self._get_customer_id(from_number if direction == "inbound" else to_number)
         
         session = CallSession(
             call_sid=call_sid,
-            customer_id=customer.id if customer else None,
-            direction=CallDirection(direction),
+            customer_id=customer_id,
+            direction=CALL_DIRECTION_BY_VALUE[direction],
             from_number=from_number,
             to_number=to_number,
             initial_agent=initial_agent,
@@ -65,8 +140,7 @@ class CallService:
         
         # Check DND registry (TRAI compliance)
         if settings.TRAI_DND_CHECK_ENABLED:
-            customer = await self._get_customer_by_phone(to_number)
-            if customer and customer.dnd_registered:
+            if await self._is_dnd_registered(to_number):
                 logger.warning(f"Cannot call DND registered number: {to_number}")
                 raise ValueError("Customer is registered on DND list")
         
@@ -75,8 +149,9 @@ class CallService:
             logger.warning("Attempted call outside allowed hours")
             raise ValueError("Calls only allowed between 9 AM - 9 PM IST")
         
-        # Make Twilio call
-        call = self.twilio_client.calls.create(
+        # Make Twilio call (the SDK blocks, so keep it off the event loop)
+        call = await asyncio.to_thread(
+            self.twilio_client.calls.create,
             to=to_number,
             from_=settings.TWILIO_PHONE_NUMBER,
             url=f"{settings.TWILIO_WEBHOOK_URL}/api/v1/twilio/incoming",
@@ -92,7 +167,8 @@ class CallService:
             from_number=settings.TWILIO_PHONE_NUMBER,
             to_number=to_number,
             direction="outbound",
-            initial_agent=AgentType(agent_type)
+            # Unknown types fall through to AgentType() for its ValueError
+            initial_agent=AGENT_TYPE_BY_VALUE.get(agent_type) or AgentType(agent_type)
         )
         
         logger.info(f"Initiated outbound call: {call.sid} to {to_number}")
@@ -106,52 +182,56 @@ class CallService:
     ):
         """Update call session status"""
         
+        ended = status in _ENDED_STATUSES
+        timed = bool(duration)
+        if not (ended or timed):
+            # Nothing to record for intermediate statuses
+            return
+        
         result = await self.db.execute(
-            select(CallSession).where(CallSession.call_sid == call_sid)
+            self._STATUS_UPDATES[ended, timed],
+            {"sid": call_sid, "ended_at_value": datetime.utcnow(), "duration_value": duration}
         )
-        session = result.scalars().first()
-        
-        if session:
-            if status in ["completed", "failed", "busy", "no-answer"]:
-                session.ended_at = datetime.utcnow()
-            
-            if duration:
-                session.duration = duration
-                # Calculate Twilio cost
-                session.cost_twilio = duration / 60 * (
-                    0.0085 if session.direction == CallDirection.INBOUND else 0.0140
-                )
-            
-            await self.db.commit()
+        await self.db.commit()
+        
+        if result.rowcount:
             logger.info(f"Updated call status: {call_sid} - {status}")
     
     async def update_recording_url(self, call_sid: str, recording_url: str):
         """Update recording URL for call session"""
         
         result = await self.db.execute(
-            select(CallSession).where(CallSession.call_sid == call_sid)
+            self._RECORDING_UPDATE,
+            {"sid": call_sid, "recording_url_value": recording_url}
         )
-        session = result.scalars().first()
+        await self.db.commit()
         
-        if session:
-            session.recording_url = recording_url
-            await self.db.commit()
+        if result.rowcount:
             logger.info(f"Updated recording URL for call: {call_sid}")
     
-    async def _get_customer_by_phone(self, phone_number: str) -> Optional[Customer]:
-        """Get customer by phone number"""
+    async def _get_customer_id(self, phone_number: str) -> Optional[uuid.UUID]:
+        """Get customer id by phone number (cached for CUSTOMER_CACHE_TTL_SECONDS)"""
+        customer_id = _CUSTOMER_IDS.get(phone_number)
+        if customer_id is not None:
+            return customer_id
+        
         result = await self.db.execute(
-            select(Customer).where(Customer.phone_number == phone_number)
+            select(Customer.id).where(Customer.phone_number == phone_number)
         )
-        return result.scalars().first()
+        customer_id = result.scalar()
+        if customer_id is not None:
+            _CUSTOMER_IDS[phone_number] = customer_id
+        return customer_id
+    
+    async def _is_dnd_registered(self, phone_number: str) -> bool:
+        """Check the customer's DND registration (always read fresh)"""
+        result = await self.db.execute(
+            select(Customer.dnd_registered).where(Customer.phone_number == phone_number)
+        )
+        return bool(result.scalar())
     
     def _is_within_calling_hours(self) -> bool:
         """Check if current time is within allowed calling hours"""
-        from datetime import datetime
-        import pytz
-        
-        tz = pytz.timezone(settings.TRAI_TIMEZONE)
-        now = datetime.now(tz)
-        hour = now.hour
+        hour = datetime.now(_TRAI_TZ).hour
         
         return settings.TRAI_CALLING_START_HOUR <= hour < settings.TRAI_CALLING_END_HOUR
@@ -3,7 +3,9 @@ Driver Assignment Service
 Handles driver search, assignment, and tracking
 """
 import logging
-from typing import Dict, Any, List, Optional
+import math
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
 import random
 
@@ -40,6 +42,37 @@ DRIVERS = {
     }
 }
 
+# Spatial index over DRIVERS: drivers bucketed by grid cell (~5.5 km of
+# latitude per cell) plus the set that is currently available, so a search
+# only looks at drivers in the cells its radius covers
+_CELL_DEGREES = 0.05
+_KM_PER_DEGREE = 111.32
+_EARTH_RADIUS_KM = 6371.0
+
+
+def _cell(location: Dict[str, float]) -> Tuple[int, int]:
+    """Grid cell containing a location"""
+    return (
+        math.floor(location["lat"] / _CELL_DEGREES),
+        math.floor(location["lng"] / _CELL_DEGREES)
+    )
+
+
+def _distance_km(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """Great-circle (haversine) distance between two locations"""
+    lat1, lat2 = math.radians(a["lat"]), math.radians(b["lat"])
+    dlat = lat2 - lat1
+    dlng = math.radians(b["lng"] - a["lng"])
+    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+_DRIVER_CELLS: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+for _driver in DRIVERS.values():
+    _DRIVER_CELLS[_cell(_driver["location"])].add(_driver["id"])
+
+_AVAILABLE_DRIVERS: Set[str] = {d["id"] for d in DRIVERS.values() if d["status"] == "available"}
+
 
 class DriverService:
     """Handles driver operations"""
@@ -47,18 +80,41 @@ class DriverService:
     def __init__(self):
         self.active_deliveries = {}
     
-    def find_available_drivers(self, location: Dict[str, float], radius_km: int = 5) -> List[Dict[str, Any]]:
+    def find_available_drivers(
+        self,
+        location: Dict[str, float],
+        radius_km: int = 5,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Find available drivers near location
         
         Args:
             location: Customer location coordinates
             radius_km: Search radius in kilometers
+            limit: Return at most this many drivers
         
         Returns:
-            List of available drivers
+            Available drivers within the radius, nearest first
         """
-        available = [d for d in DRIVERS.values() if d["status"] == "available"]
+        lat_cells = math.ceil(radius_km / _KM_PER_DEGREE / _CELL_DEGREES)
+        lng_km = _KM_PER_DEGREE * max(math.cos(math.radians(location["lat"])), 0.01)
+        lng_cells = math.ceil(radius_km / lng_km / _CELL_DEGREES)
+        
+        row, col = _cell(location)
+        nearby = []
+        for r in range(row - lat_cells, row + lat_cells + 1):
+            for c in range(col - lng_cells, col + lng_cells + 1):
+                for driver_id in _DRIVER_CELLS.get((r, c), ()):
+                    if driver_id not in _AVAILABLE_DRIVERS:
+                        continue
+                    driver = DRIVERS[driver_id]
+                    distance = _distance_km(location, driver["location"])
+                    if distance <= radius_km:
+                        nearby.append((distance, driver))
+        
+        nearby.sort(key=lambda item: item[0])
+        available = [driver for _, driver in nearby[:limit]]
         logger.info(f"Found {len(available)} available drivers")
         return available
     
@@ -85,6 +141,7 @@ class DriverService:
         
         # Update driver status
         DRIVERS[driver_id]["status"] = "on_delivery"
+        _AVAILABLE_DRIVERS.discard(driver_id)
         
         # Calculate ETA (mock calculation)
         pickup_eta = random.randint(5, 10)
@@ -117,6 +174,12 @@ class DriverService:
     def update_driver_location(self, driver_id: str, location: Dict[str, float]) -> bool:
         """Update driver's current location"""
         if driver_id in DRIVERS:
+            old_cell = _cell(DRIVERS[driver_id]["location"])
+            new_cell = _cell(location)
+            if new_cell != old_cell:
+                _DRIVER_CELLS[old_cell].discard(driver_id)
+                _DRIVER_CELLS[new_cell].add(driver_id)
+            
             DRIVERS[driver_id]["location"] = location
             return True
         return False
@@ -140,6 +203,7 @@ class DriverService:
             driver_id = delivery["driver_id"]
             if driver_id in DRIVERS:
                 DRIVERS[driver_id]["status"] = "available"
+                _AVAILABLE_DRIVERS.add(driver_id)
             
             logger.info(f"✅ Order {order_id} delivered successfully")
             return True
@@ -0,0 +1,34 @@
+"""
+G.711 mu-law Decoding
+Converts Twilio's 8-bit mu-law media frames to 16-bit linear PCM
+"""
+import numpy as np
+
+# Twilio media streams are 8 kHz mono mu-law
+SAMPLE_RATE = 8000
+
+_BIAS = 0x84
+
+
+def _decode_sample(code: int) -> int:
+    """Decode one mu-law byte (sign, 3-bit exponent, 4-bit mantissa)"""
+    code = ~code & 0xFF
+    magnitude = (((code & 0x0F) << 3) + _BIAS) << ((code & 0x70) >> 4)
+    return _BIAS - magnitude if code & 0x80 else magnitude - _BIAS
+
+
+# Every possible byte decoded once; conversion is then a single table gather
+_ULAW_TO_PCM16 = np.array([_decode_sample(code) for code in range(256)], dtype="<i2")
+
+
+def ulaw_to_pcm16(data: bytes) -> bytes:
+    """
+    Convert mu-law audio to little-endian 16-bit PCM
+    
+    Args:
+        data: mu-law samples, one byte each
+    
+    Returns:
+        PCM16 samples, two bytes each
+    """
+    return _ULAW_TO_PCM16[np.frombuffer(data, dtype=np.uint8)].tobytes()
@@ -3,10 +3,13 @@ Order Management Service
 Handles complete order lifecycle
 """
 import logging
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
 from datetime import datetime
 import uuid
 
+if TYPE_CHECKING:
+    from app.services.driver_service import DriverService
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,11 +27,22 @@ class OrderStatus:
     CANCELLED = "cancelled"
 
 
+# Once the driver has the order it can no longer be cancelled
+_NON_CANCELLABLE_STATUSES = frozenset({
+    OrderStatus.PICKED_UP,
+    OrderStatus.IN_TRANSIT,
+    OrderStatus.DELIVERED
+})
+
+
 class OrderService:
     """Manages order lifecycle"""
     
     def __init__(self):
         self.orders = {}
+        # Joined item names per order ID, kept off the order dict so they
+        # don't leak into API responses. Items are set once, in create_order
+        self._items_summaries: Dict[str, str] = {}
     
     def create_order(self, customer_phone: str, items: list, address: str, payment_method: str) -> Dict[str, Any]:
         """
@@ -47,6 +61,7 @@ class OrderService:
         
         # Calculate total
         total = sum(item['price'] for item in items)
+        now = datetime.now().isoformat()
         
         order = {
             "order_id": order_id,
@@ -56,14 +71,15 @@ class OrderService:
             "delivery_address": address,
             "payment_method": payment_method,
             "status": OrderStatus.PLACED,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "status_history": [
-                {"status": OrderStatus.PLACED, "timestamp": datetime.now().isoformat()}
+                {"status": OrderStatus.PLACED, "timestamp": now}
             ]
         }
         
         self.orders[order_id] = order
+        self._items_summaries[order_id] = ", ".join(item['name'] for item in items)
         logger.info(f"✅ Order created: {order_id} - Total: ₹{total}")
         
         return order
@@ -85,13 +101,14 @@ class OrderService:
         
         order = self.orders[order_id]
         old_status = order["status"]
+        now = datetime.now().isoformat()
         order["status"] = new_status
-        order["updated_at"] = datetime.now().isoformat()
+        order["updated_at"] = now
         
         # Add to status history
         history_entry = {
             "status": new_status,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now
         }
         if notes:
             history_entry["notes"] = notes
@@ -106,22 +123,58 @@ class OrderService:
         """Get order by ID"""
         return self.orders.get(order_id)
     
-    def cancel_order(self, order_id: str, reason: str) -> bool:
-        """Cancel order"""
-        if order_id not in self.orders:
-            return False
+    def get_items_summary(self, order_id: str) -> str:
+        """Get the comma-separated item names of an order"""
+        return self._items_summaries[order_id]
+    
+    def get_order_with_delivery(
+        self,
+        order_id: str,
+        driver_service: "DriverService"
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Get order and its delivery in one call
         
-        order = self.orders[order_id]
+        The delivery is only looked up for orders that exist, so unknown
+        order IDs cost a single dict miss.
+        
+        Args:
+            order_id: Order identifier
+            driver_service: Service tracking deliveries
+        
+        Returns:
+            Tuple of (order or None, delivery or None)
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            return None, None
+        
+        return order, driver_service.get_delivery_status(order_id)
+    
+    def cancel_order(self, order_id: str, reason: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel order
+        
+        Args:
+            order_id: Order identifier
+            reason: Cancellation reason
+        
+        Returns:
+            The cancelled order, or None if it doesn't exist or can't be cancelled
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
         
         # Only allow cancellation before picked up
-        if order["status"] in [OrderStatus.PICKED_UP, OrderStatus.IN_TRANSIT, OrderStatus.DELIVERED]:
+        if order["status"] in _NON_CANCELLABLE_STATUSES:
             logger.warning(f"Cannot cancel order {order_id} - already {order['status']}")
-            return False
+            return None
         
         self.update_status(order_id, OrderStatus.CANCELLED, reason)
         logger.info(f"❌ Order {order_id} cancelled: {reason}")
         
-        return True
+        return order
     
     def get_customer_orders(self, customer_phone: str) -> list:
         """Get all orders for a customer"""
@@ -58,14 +58,14 @@ class RestaurantService:
         
         # Calculate prep time
         prep_time = restaurant["avg_prep_time"]
-        ready_time = datetime.now() + timedelta(minutes=prep_time)
+        ready_time = (datetime.now() + timedelta(minutes=prep_time)).isoformat()
         
         # Store order
         self.pending_orders[order_id] = {
             "restaurant_id": restaurant_id,
             "order_details": order_details,
             "prep_time": prep_time,
-            "ready_time": ready_time.isoformat(),
+            "ready_time": ready_time,
             "status": "preparing"
         }
         
@@ -75,7 +75,7 @@ class RestaurantService:
             "success": True,
             "restaurant_name": restaurant["name"],
             "prep_time_minutes": prep_time,
-            "ready_time": ready_time.isoformat(),
+            "ready_time": ready_time,
             "status": "preparing"
         }
     
@@ -4,9 +4,10 @@ Redis-based session and state management
 Handles conversation context, order state, and agent transitions
 """
 import logging
-import json
-from typing import Dict, List, Any, Optional
+import orjson
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 from redis import asyncio as aioredis
+from redis.asyncio.lock import Lock
 from datetime import datetime, timedelta
 
 from app.core.config import settings
@@ -14,6 +15,11 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 
 
+def _dumps(value: Any) -> bytes:
+    """Serialize a value for Redis (int dict keys become strings, as with json)"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
 class StateManager:
     """
     Manages session state and conversation context using Redis
@@ -70,7 +76,7 @@ class StateManager:
         await self.redis_client.setex(
             f"session:{session_id}",
             settings.REDIS_SESSION_TTL,
-            json.dumps(session_data)
+            _dumps(session_data)
         )
         
         logger.info(f"Created session: {session_id}")
@@ -91,7 +97,7 @@ class StateManager:
         data = await self.redis_client.get(f"session:{session_id}")
         
         if data:
-            return json.loads(data)
+            return orjson.loads(data)
         return None
     
     async def update_session(self, session_id: str, updates: Dict[str, Any]):
@@ -115,7 +121,7 @@ class StateManager:
         await self.redis_client.setex(
             f"session:{session_id}",
             settings.REDIS_SESSION_TTL,
-            json.dumps(session_data)
+            _dumps(session_data)
         )
     
     async def add_message(
@@ -153,7 +159,8 @@ class StateManager:
     async def get_messages(
         self,
         session_id: str,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        projection: Optional[Sequence[str]] = None
     ) -> List[Dict[str, str]]:
         """
         Get conversation history
@@ -161,6 +168,7 @@ class StateManager:
         Args:
             session_id: Session identifier
             limit: Optional limit on number of messages
+            projection: Optional message fields to return (e.g. role, content)
         
         Returns:
             List of messages
@@ -169,11 +177,46 @@ class StateManager:
         if not session_data:
             return []
         
+        return self._select_messages(session_data, limit, projection)
+    
+    async def get_session_and_messages(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        projection: Optional[Sequence[str]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, str]]]:
+        """
+        Get session data and conversation history in one Redis round trip
+        
+        Args:
+            session_id: Session identifier
+            limit: Optional limit on number of messages
+            projection: Optional message fields to return (e.g. role, content)
+        
+        Returns:
+            Tuple of (session data or None, list of messages)
+        """
+        session_data = await self.get_session(session_id)
+        if not session_data:
+            return None, []
+        
+        return session_data, self._select_messages(session_data, limit, projection)
+    
+    @staticmethod
+    def _select_messages(
+        session_data: Dict[str, Any],
+        limit: Optional[int],
+        projection: Optional[Sequence[str]]
+    ) -> List[Dict[str, Any]]:
+        """Slice the stored history and keep only the projected fields"""
         messages = session_data.get("messages", [])
         
         if limit:
             messages = messages[-limit:]
         
+        if projection:
+            messages = [{field: msg[field] for field in projection} for msg in messages]
+        
         return messages
     
     async def update_order_state(self, session_id: str, order_data: Dict[str, Any]):
@@ -281,7 +324,7 @@ class StateManager:
         await self.redis_client.setex(
             metrics_key,
             settings.REDIS_SESSION_TTL,
-            json.dumps(metrics)
+            _dumps(metrics)
         )
         
         logger.info(f"Saved metrics for session {session_id}")
@@ -292,7 +335,7 @@ class StateManager:
         
         data = await self.redis_client.get(f"metrics:{session_id}")
         if data:
-            return json.loads(data)
+            return orjson.loads(data)
         return {}
     
     async def cache_set(
@@ -316,7 +359,7 @@ class StateManager:
         await self.redis_client.setex(
             f"cache:{key}",
             ttl,
-            json.dumps(value)
+            _dumps(value)
         )
     
     async def cache_get(self, key: str) -> Optional[Any]:
@@ -325,9 +368,51 @@ class StateManager:
         
         data = await self.redis_client.get(f"cache:{key}")
         if data:
-            return json.loads(data)
+            return orjson.loads(data)
+        return None
+    
+    async def get_call_conversation(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        """Get the keyword-flow conversation for a call"""
+        await self._ensure_connection()
+        
+        data = await self.redis_client.get(f"conv:{call_sid}")
+        if data:
+            return orjson.loads(data)
         return None
     
+    async def save_call_conversation(self, call_sid: str, conversation: Dict[str, Any]):
+        """Store the keyword-flow conversation for a call (refreshes its TTL)"""
+        await self._ensure_connection()
+        
+        await self.redis_client.setex(
+            f"conv:{call_sid}",
+            settings.REDIS_SESSION_TTL,
+            _dumps(conversation)
+        )
+    
+    async def call_lock(self, call_sid: str, timeout: float = 5.0) -> Lock:
+        """
+        Lock serializing turns of one call across workers
+        
+        Use as `async with await state_manager.call_lock(call_sid):`. The
+        lock expires after timeout seconds so a crashed worker can't wedge
+        the call, and acquiring it gives up after the same time.
+        
+        Args:
+            call_sid: Twilio call SID
+            timeout: Lock TTL and maximum wait in seconds
+        
+        Returns:
+            Redis lock (SET NX with an expiry, token-checked release)
+        """
+        await self._ensure_connection()
+        
+        return self.redis_client.lock(
+            f"lock:conv:{call_sid}",
+            timeout=timeout,
+            blocking_timeout=timeout
+        )
+    
     async def delete_session(self, session_id: str):
         """Delete session"""
         await self._ensure_connection()
@@ -343,8 +428,17 @@ class StateManager:
         # This method is for manual cleanup if needed
         pass
     
+    async def ping(self) -> bool:
+        """Check Redis connectivity over the shared connection pool"""
+        await self._ensure_connection()
+        return await self.redis_client.ping()
+    
     async def close(self):
         """Close Redis connection"""
         if self.redis_client:
             await self.redis_client.close()
             self._initialized = False
+
+
+# Global state manager instance
+state_manager = StateManager()
@@ -5,6 +5,10 @@ Routes single call through multiple agents based on context
 from typing import Dict, Any, Optional
 import logging
 
+from cachetools import TTLCache
+
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -217,12 +221,17 @@ class VoiceOrchestrator:
         self.conversation_state["order_id"] = order_id
 
 
-# Global orchestrators for each call
-active_orchestrators = {}
+# Global orchestrators for each call; bounded, and abandoned calls age out
+# with the same TTL as their Redis conversation
+active_orchestrators: "TTLCache[str, VoiceOrchestrator]" = TTLCache(
+    maxsize=10_000,
+    ttl=settings.REDIS_SESSION_TTL
+)
 
 
 def get_orchestrator(call_sid: str) -> VoiceOrchestrator:
     """Get or create orchestrator for call"""
-    if call_sid not in active_orchestrators:
-        active_orchestrators[call_sid] = VoiceOrchestrator(call_sid)
-    return active_orchestrators[call_sid]
+    orchestrator = active_orchestrators.get(call_sid)
+    if orchestrator is None:
+        orchestrator = active_orchestrators[call_sid] = VoiceOrchestrator(call_sid)
+    return orchestrator
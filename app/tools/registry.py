@@ -3,7 +3,7 @@ Tool Registry
 Central registry for all agent tools/functions
 """
 import logging
-from typing import Dict, Callable, Any, Optional
+from typing import Dict, Callable, Any, Optional, Set
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +16,7 @@ class ToolRegistry:
     
     def __init__(self):
         self._tools: Dict[str, Callable] = {}
+        self._non_speculative: Set[str] = set()
         self._register_all_tools()
     
     def _register_all_tools(self):
@@ -34,15 +35,33 @@ class ToolRegistry:
         
         logger.info(f"Registered {len(self._tools)} tools")
     
-    def register(self, name: str, func: Callable):
-        """Register a tool"""
+    def register(self, name: str, func: Callable, speculative: bool = True):
+        """
+        Register a tool
+        
+        Args:
+            name: Tool name exposed to the LLM
+            func: Async tool implementation
+            speculative: Whether the follow-up LLM call may start before this
+                tool finishes. Register sensitive tools (payments, refunds)
+                with speculative=False so no answer is drafted before their
+                outcome is known.
+        """
         self._tools[name] = func
+        if speculative:
+            self._non_speculative.discard(name)
+        else:
+            self._non_speculative.add(name)
         logger.debug(f"Registered tool: {name}")
     
     def get_tool(self, name: str) -> Optional[Callable]:
         """Get tool by name"""
         return self._tools.get(name)
     
+    def is_speculative(self, name: str) -> bool:
+        """Check if the follow-up LLM call may overlap this tool's execution"""
+        return name in self._tools and name not in self._non_speculative
+    
     def list_tools(self) -> list:
         """List all registered tools"""
         return list(self._tools.keys())
@@ -56,6 +75,10 @@ class ToolRegistry:
         }
 
 
+# Global tool registry instance
+tool_registry = ToolRegistry()
+
+
 # TODO: Implement actual tools in separate files:
 # app/tools/customer_tools.py
 # app/tools/restaurant_tools.py
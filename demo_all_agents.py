@@ -200,7 +200,7 @@ def demo_complete_flow():
     🔗 Try the APIs yourself:
     • Voice: Call +1 218-496-4536
     • API Docs: http://localhost:8000/docs
-    • Monitoring: http://localhost:8000/api/monitoring/metrics
+    • Monitoring: http://localhost:8000/api/monitoring/metrics (Prometheus format)
     """)
 
 if __name__ == "__main__":
@@ -3,7 +3,6 @@ Orchestrator Decision Log Viewer
 Shows real-time routing decisions during voice calls
 """
 import logging
-from app.services.ai_handler import conversations
 from app.agents.orchestrator_agent import orchestrator
 
 logging.basicConfig(
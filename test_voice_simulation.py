@@ -2,10 +2,15 @@
 Voice Conversation Simulator
 Simulates complete 6-agent voice flow without making actual call
 Tests conversation logic locally
+
+Conversation state lives in Redis, so a Redis server must be reachable at
+REDIS_URL before running this script.
 """
+import asyncio
 import sys
 import time
-from app.services.ai_handler import process_order_with_ai, conversations
+from app.services.ai_handler import process_order_with_ai
+from app.services.state_manager import state_manager
 
 def print_bot(message):
     """Print bot response with typing effect"""
@@ -24,7 +29,7 @@ def print_section(title):
     print(f"  {title}")
     print("="*70)
 
-def simulate_conversation():
+async def simulate_conversation():
     """Simulate complete 6-agent conversation flow"""
     
     # Simulate call SID
@@ -40,21 +45,21 @@ def simulate_conversation():
     print_section("PHASE 1: ORDER AGENT - Food Ordering")
     
     # Initial greeting
-    response = process_order_with_ai(call_sid, "start")
+    response = await process_order_with_ai(call_sid, "start")
     print_bot(response)
     time.sleep(1)
     
     # Order items
     user_msg = "I want pizza and fries"
     print_user(user_msg)
-    response = process_order_with_ai(call_sid, user_msg)
+    response = await process_order_with_ai(call_sid, user_msg)
     print_bot(response)
     time.sleep(1)
     
     # Complete ordering
     user_msg = "That's all"
     print_user(user_msg)
-    response = process_order_with_ai(call_sid, user_msg)
+    response = await process_order_with_ai(call_sid, user_msg)
     print_bot(response)
     time.sleep(1)
     
@@ -63,7 +68,7 @@ def simulate_conversation():
     
     user_msg = "123 MG Road Bangalore Karnataka"
     print_user(user_msg)
-    response = process_order_with_ai(call_sid, user_msg)
+    response = await process_order_with_ai(call_sid, user_msg)
     print_bot(response)
     time.sleep(1)
     
@@ -73,7 +78,7 @@ def simulate_conversation():
     
     user_msg = "Cash on delivery"
     print_user(user_msg)
-    response = process_order_with_ai(call_sid, user_msg)
+    response = await process_order_with_ai(call_sid, user_msg)
     print_bot(response)
     
     print("\n🔔 Backend Services Triggered:")
@@ -87,7 +92,7 @@ def simulate_conversation():
     
     user_msg = "Track order"
     print_user(user_msg)
-    response = process_order_with_ai(call_sid, user_msg)
+    response = await process_order_with_ai(call_sid, user_msg)
     print_bot(response)
     time.sleep(1)
     
@@ -96,13 +101,13 @@ def simulate_conversation():
     
     user_msg = "Support"
     print_user(user_msg)
-    response = process_order_with_ai(call_sid, user_msg)
+    response = await process_order_with_ai(call_sid, user_msg)
     print_bot(response)
     time.sleep(1)
     
     user_msg = "Food was cold"
     print_user(user_msg)
-    response = process_order_with_ai(call_sid, user_msg)
+    response = await process_order_with_ai(call_sid, user_msg)
     print_bot(response)
     time.sleep(1)
     
@@ -111,7 +116,7 @@ def simulate_conversation():
     
     user_msg = "2 stars"
     print_user(user_msg)
-    response = process_order_with_ai(call_sid, user_msg)
+    response = await process_order_with_ai(call_sid, user_msg)
     print_bot(response)
     
     # ========== SUMMARY ==========
@@ -126,8 +131,8 @@ def simulate_conversation():
     print("   6️⃣ Feedback Agent - Collected 2-star rating + 20% promo")
     
     print("\n📊 Conversation State:")
-    if call_sid in conversations:
-        conv = conversations[call_sid]
+    conv = await state_manager.get_call_conversation(call_sid)
+    if conv:
         print(f"   Order Items: {len(conv.get('order', []))} items")
         print(f"   Address: {conv.get('address', 'N/A')}")
         print(f"   Payment: {conv.get('payment_method', 'N/A')}")
@@ -141,10 +146,12 @@ def simulate_conversation():
     print("   → Customer can track, get support, give feedback in same call")
     
     print("\n" + "="*70)
+    
+    await state_manager.close()
 
 if __name__ == "__main__":
     try:
-        simulate_conversation()
+        asyncio.run(simulate_conversation())
     except KeyboardInterrupt:
         print("\n\n⚠️ Simulation interrupted by user")
     except Exception as e: